@@ -40,6 +40,9 @@ class Action:
             and set(self.effect_add) == set(other.effect_add) \
             and set(self.effect_rem) == set(other.effect_rem)
 
+    def __hash__(self):
+        return hash((self.name, self.args))
+
     def substitute(self, e, args):
         """Replaces variables in expression with their respective Propostional symbol"""
         new_args = list(e.args)
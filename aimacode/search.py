@@ -5,9 +5,12 @@ then create problem instances and solve them with calls to the various search
 functions."""
 
 from .utils import (
-    is_in, memoize, print_table, Stack, FIFOQueue, PriorityQueue, name
+    is_in, memoize, print_table, Stack, FIFOQueue, IndexedStack, IndexedFIFOQueue,
+    IndexedPriorityQueue, name
 )
 
+from array import array
+import collections
 import sys
 
 infinity = float('inf')
@@ -60,6 +63,13 @@ class Problem:
         and action. The default method costs 1 for every step in the path."""
         return c + 1
 
+    def canonical(self, state):
+        """Return the representative of the states symmetric to state. Graph
+        searches treat states with the same canonical state as duplicates, so
+        override this only with states that have the same solutions up to a
+        renaming. The default method returns the state itself."""
+        return state
+
     def value(self, state):
         """For optimization problems, each state has a value.  Hill-climbing
         and related algorithms try to maximize this value."""
@@ -67,6 +77,61 @@ class Problem:
 # ______________________________________________________________________________
 
 
+class NodeStore:
+
+    """The nodes of one search tree in parallel arrays: node i is entry i of
+    the arrays of state, parent id, action id, path cost (g), f, h and depth,
+    so a node takes about fifty bytes besides its state and values. The
+    actions are registered once, keyed by the (hashable) action itself, and
+    referred to by id. The searches create a store with the root Node and
+    every Node is a view of one entry; f and h are None until set (see
+    memoize). The graph searches only create the nodes of the
+    states they keep, so each state they reach has one entry. A search can
+    release the entries of a subtree it is done with by going back to a mark
+    taken before expanding it (see depth_limited_search)."""
+
+    def __init__(self):
+        self.states = []
+        self.action_ids = {}
+        self.actions = []
+        self.parent = array('i')
+        self.action = array('i')
+        self.g = []
+        self.f = []
+        self.h = []
+        self.depth = array('i')
+
+    def __len__(self):
+        return len(self.states)
+
+    def add(self, state, parent, action, path_cost):
+        """Store a node and return its id; parent is a node id or -1."""
+        aid = -1
+        if action is not None:
+            aid = self.action_ids.get(action)
+            if aid is None:
+                aid = self.action_ids[action] = len(self.actions)
+                self.actions.append(action)
+        self.states.append(state)
+        self.parent.append(parent)
+        self.action.append(aid)
+        self.g.append(path_cost)
+        self.f.append(None)
+        self.h.append(None)
+        self.depth.append(self.depth[parent] + 1 if parent >= 0 else 0)
+        return len(self.states) - 1
+
+    def mark(self):
+        """Return the size of the store, to release the nodes added later."""
+        return len(self.states)
+
+    def release(self, mark):
+        """Drop the nodes added since mark. Their Node views must not be used
+        anymore."""
+        for a in (self.states, self.parent, self.action, self.g, self.f, self.h, self.depth):
+            del a[mark:]
+
+
 class Node:
 
     """A node in a search tree. Contains a pointer to the parent (the node
@@ -76,17 +141,71 @@ class Node:
     the total path_cost (also known as g) to reach the node.  Other functions
     may add an f and h value; see best_first_graph_search and astar_search for
     an explanation of how the f and h values are handled. You will not need to
-    subclass this class."""
+    subclass this class.
+    A Node is a view of an entry of the NodeStore of its search tree: only
+    the store, the entry id and the state are held by the object, the parent,
+    action, path cost, depth, f and h are read from the store."""
+
+    __slots__ = ('store', 'id', 'state', '__weakref__')
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         "Create a search tree Node, derived from a parent by an action."
         self.state = state
-        self.parent = parent
-        self.action = action
-        self.path_cost = path_cost
-        self.depth = 0
-        if parent:
-            self.depth = parent.depth + 1
+        if parent is None:
+            self.store = NodeStore()
+            self.id = self.store.add(state, -1, action, path_cost)
+        else:
+            self.store = parent.store
+            self.id = self.store.add(state, parent.id, action, path_cost)
+
+    @classmethod
+    def view(cls, store, i):
+        "The Node of entry i of a store."
+        node = cls.__new__(cls)
+        node.store = store
+        node.id = i
+        node.state = store.states[i]
+        return node
+
+    @property
+    def parent(self):
+        i = self.store.parent[self.id]
+        return Node.view(self.store, i) if i >= 0 else None
+
+    @property
+    def action(self):
+        i = self.store.action[self.id]
+        return self.store.actions[i] if i >= 0 else None
+
+    @property
+    def path_cost(self):
+        return self.store.g[self.id]
+
+    @property
+    def depth(self):
+        return self.store.depth[self.id]
+
+    @property
+    def f(self):
+        value = self.store.f[self.id]
+        if value is None:
+            raise AttributeError('f')
+        return value
+
+    @f.setter
+    def f(self, value):
+        self.store.f[self.id] = value
+
+    @property
+    def h(self):
+        value = self.store.h[self.id]
+        if value is None:
+            raise AttributeError('h')
+        return value
+
+    @h.setter
+    def h(self, value):
+        self.store.h[self.id] = value
 
     def __repr__(self):
         return "<Node %s>" % (self.state,)
@@ -102,6 +221,17 @@ class Node:
     def child_node(self, problem, action):
         "[Figure 3.10]"
         next = problem.result(self.state, action)
+        return self.child(problem, action, next)
+
+    def child_states(self, problem):
+        """List the (action, state) pairs reachable in one step from this
+        node, without creating their nodes."""
+        state = self.state
+        return [(action, problem.result(state, action))
+                for action in problem.actions(state)]
+
+    def child(self, problem, action, next):
+        "The child node reached by action, whose state is next."
         return Node(next, self, action,
                     problem.path_cost(self.path_cost, self.state,
                                       action, next))
@@ -112,10 +242,10 @@ class Node:
 
     def path(self):
         "Return a list of nodes forming the path from the root to this node."
-        node, path_back = self, []
-        while node:
-            path_back.append(node)
-            node = node.parent
+        store, i, path_back = self.store, self.id, []
+        while i >= 0:
+            path_back.append(Node.view(store, i))
+            i = store.parent[i]
         return list(reversed(path_back))
 
     # We want for a queue of nodes in breadth_first_search or
@@ -146,20 +276,31 @@ def tree_search(problem, frontier):
     return None
 
 
+def state_key(problem):
+    """Return the function giving the canonical state of a node, the key of
+    the nodes in the indexed frontiers of the graph searches."""
+    canonical = problem.canonical
+    return lambda node: canonical(node.state)
+
+
 def graph_search(problem, frontier):
     """Search through the successors of a problem to find a goal.
-    The argument frontier should be an empty queue.
-    If two paths reach a state, only use the first one. [Figure 3.7]"""
+    The argument frontier should be an empty IndexedQueue keyed by
+    state_key(problem), e.g. IndexedStack(state_key(problem)).
+    If two paths reach a state, only use the first one. [Figure 3.7]
+    States with the same problem.canonical state count as the same state."""
+    canonical = problem.canonical
     frontier.append(Node(problem.initial))
     explored = set()
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
             return node
-        explored.add(node.state)
-        frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and
-                        child not in frontier)
+        explored.add(canonical(node.state))
+        for action, state in node.child_states(problem):
+            key = canonical(state)
+            if key not in explored and not frontier.has_key(key):
+                frontier.append(node.child(problem, action, state))
     return None
 
 
@@ -175,7 +316,7 @@ def depth_first_tree_search(problem):
 
 def depth_first_graph_search(problem):
     "Search the deepest nodes in the search tree first."
-    return graph_search(problem, Stack())
+    return graph_search(problem, IndexedStack(state_key(problem)))
 
 
 def breadth_first_search(problem):
@@ -183,54 +324,82 @@ def breadth_first_search(problem):
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = FIFOQueue()
+    canonical = problem.canonical
+    frontier = IndexedFIFOQueue(state_key(problem))
     frontier.append(node)
     explored = set()
     while frontier:
         node = frontier.pop()
-        explored.add(node.state)
-        for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
-                if problem.goal_test(child.state):
+        explored.add(canonical(node.state))
+        for action, state in node.child_states(problem):
+            key = canonical(state)
+            if key not in explored and not frontier.has_key(key):
+                child = node.child(problem, action, state)
+                if problem.goal_test(state):
                     return child
                 frontier.append(child)
     return None
 
 
-def best_first_graph_search(problem, f):
+# Tie-breaking policies of the best-first frontier: a function of a node, the
+# number of nodes appended before it and the heuristic function h given to
+# best_first_graph_search, ordering the nodes of equal f.
+TIE_BREAKING = {
+    'state': None,  # Node.__lt__, comparing the states
+    'fifo': lambda node, count, h: count,
+    'lifo': lambda node, count, h: -count,
+    'low_h': lambda node, count, h: (h(node), count),
+    'low_h_lifo': lambda node, count, h: (h(node), -count),
+}
+
+
+def best_first_graph_search(problem, f, tie_breaking='state', h=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    Nodes of equal f are ordered by the tie_breaking policy, a name in
+    TIE_BREAKING. The policies on h use h, the heuristic part of f (see
+    astar_search); without it they use f, which is h in greedy search."""
     f = memoize(f, 'f')
+    h = f if h is None else memoize(h, 'h')
+    policy = TIE_BREAKING[tie_breaking]
+    tie = None if policy is None else lambda node, count: policy(node, count, h)
+    canonical = problem.canonical
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
+    frontier = IndexedPriorityQueue(min, f, state_key(problem), tie)
     frontier.append(node)
     explored = set()
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
             return node
-        explored.add(node.state)
-        for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+        explored.add(canonical(node.state))
+        store = node.store
+        for action, state in node.child_states(problem):
+            key = canonical(state)
+            if key in explored:
+                continue
+            mark = store.mark()
+            child = node.child(problem, action, state)
+            if not frontier.has_key(key):
+                frontier.append(child)
+            elif f(child) < f(frontier[child]):
+                # decrease-key: the child replaces the incumbent in place
                 frontier.append(child)
-            elif child in frontier:
-                incumbent = frontier[child]
-                if f(child) < f(incumbent):
-                    # del frontier[incumbent]
-                    frontier.append(child)
+            else:
+                store.release(mark)
     return None
 
 
-def uniform_cost_search(problem):
+def uniform_cost_search(problem, tie_breaking='state'):
     "[Figure 3.14]"
-    return best_first_graph_search(problem, lambda node: node.path_cost)
+    return best_first_graph_search(problem, lambda node: node.path_cost, tie_breaking)
 
 
 def depth_limited_search(problem, limit=50):
@@ -242,12 +411,16 @@ def depth_limited_search(problem, limit=50):
             return 'cutoff'
         else:
             cutoff_occurred = False
-            for child in node.expand(problem):
+            children = node.expand(problem)
+            # the nodes below a child are released once it is searched
+            mark = node.store.mark()
+            for child in children:
                 result = recursive_dls(child, problem, limit - 1)
                 if result == 'cutoff':
                     cutoff_occurred = True
                 elif result is not None:
                     return result
+                node.store.release(mark)
             return 'cutoff' if cutoff_occurred else None
 
     # Body of depth_limited_search:
@@ -268,12 +441,76 @@ greedy_best_first_graph_search = best_first_graph_search
 # Greedy best-first search is accomplished by specifying f(n) = h(n).
 
 
-def astar_search(problem, h=None):
+def astar_search(problem, h=None, tie_breaking='state'):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search, or
-    else in your Problem subclass."""
+    else in your Problem subclass. Nodes of equal f are ordered as in
+    best_first_graph_search; tie_breaking='low_h' searches lowest h first."""
+    h = memoize(h or problem.h, 'h')
+    return best_first_graph_search(problem, lambda n: n.path_cost + h(n), tie_breaking, h)
+
+
+def iterative_deepening_astar_search(problem, h=None, table_size=2 ** 16, order_successors=True):
+    """IDA* search: depth-first searches of the nodes with f(n) = g(n)+h(n)
+    at most a bound, starting from h of the root and raising the bound to
+    the lowest f that exceeded it until a goal is found. The h function is
+    given as for astar_search. The depth-first search keeps its frames on
+    an explicit stack, so deep plans do not hit the recursion limit, and
+    releases the nodes below a frame when the frame is done.
+    The transposition table remembers the lowest g with which each of the
+    last table_size canonical states was reached in the current iteration;
+    a state reached again with no lower g is not searched again. With
+    table_size=0 only the states on the current path are pruned.
+    With order_successors the children of a node are searched by lowest h."""
     h = memoize(h or problem.h, 'h')
-    return best_first_graph_search(problem, lambda n: n.path_cost + h(n))
+    canonical = problem.canonical
+    root = Node(problem.initial)
+    store = root.store
+    bound = h(root)
+    table = collections.OrderedDict()
+    while True:
+        next_bound = infinity
+        table.clear()
+        root_key = canonical(root.state)
+        on_path = {root_key}
+        # frames of node, canonical state, iterator of the unsearched children and store mark
+        stack = [[root, root_key, None, store.mark()]]
+        while stack:
+            frame = stack[-1]
+            node, key, children, mark = frame
+            if children is None:
+                if problem.goal_test(node.state):
+                    return node
+                children = node.expand(problem)
+                if order_successors:
+                    children.sort(key=h)
+                children = frame[2] = iter(children)
+            for child in children:
+                f = child.path_cost + h(child)
+                if f > bound:
+                    next_bound = min(next_bound, f)
+                    continue
+                child_key = canonical(child.state)
+                if child_key in on_path:
+                    continue
+                if table_size:
+                    g = table.get(child_key)
+                    if g is not None and g <= child.path_cost:
+                        continue
+                    table[child_key] = child.path_cost
+                    table.move_to_end(child_key)
+                    if len(table) > table_size:
+                        table.popitem(last=False)
+                on_path.add(child_key)
+                stack.append([child, child_key, None, store.mark()])
+                break
+            else:
+                stack.pop()
+                on_path.discard(key)
+                store.release(mark)
+        if next_bound == infinity:
+            return None
+        bound = next_bound
 
 # ______________________________________________________________________________
 # Other search algorithms
@@ -291,6 +528,8 @@ def recursive_best_first_search(problem, h=None):
             return None, infinity
         for s in successors:
             s.f = max(s.path_cost + h(s), node.f)
+        # the nodes below a successor are released when its search fails
+        mark = node.store.mark()
         while True:
             # Order by lowest f value
             successors.sort(key=lambda x: x.f)
@@ -304,6 +543,7 @@ def recursive_best_first_search(problem, h=None):
             result, best.f = RBFS(problem, best, min(flimit, alternative))
             if result is not None:
                 return result, best.f
+            node.store.release(mark)
 
     node = Node(problem.initial)
     node.f = h(node)
@@ -345,6 +585,9 @@ class InstrumentedProblem(Problem):
     def value(self, state):
         return self.problem.value(state)
 
+    def canonical(self, state):
+        return self.problem.canonical(state)
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
@@ -4,6 +4,7 @@ import bisect
 import collections
 import collections.abc
 import functools
+import itertools
 import operator
 import os.path
 import random
@@ -513,7 +514,7 @@ class defaultkeydict(collections.defaultdict):
 
 
 # ______________________________________________________________________________
-# Queues: Stack, FIFOQueue, PriorityQueue
+# Queues: Stack, FIFOQueue, PriorityQueue, IndexedStack, IndexedFIFOQueue, IndexedPriorityQueue
 
 # TODO: Possibly use queue.Queue, queue.PriorityQueue
 # TODO: Priority queues may not belong here -- see treatment in search.py
@@ -573,7 +574,82 @@ class FIFOQueue(Queue):
         return e
 
     def __contains__(self, item):
-        return item in self.A[self.start:]
+        return any(e == item for e in itertools.islice(self.A, self.start, None))
+
+
+class IndexedQueue(Queue):
+
+    """A queue keeping a hash index of its items by key(item) alongside the
+    queue order, so membership, lookup and removal take O(1) instead of a
+    scan. Items with equal keys are one entry: appending an item whose key
+    is queued replaces the queued item and keeps its place. Removed entries
+    stay in the order until they reach the front, where pop skips them.
+    Subclasses give the order: IndexedStack, IndexedFIFOQueue.
+        q.remove(item)  -- remove the entry with the key of item
+        q[item]         -- the queued item with the key of item
+        q.has_key(key)  -- is an item with this key queued?"""
+
+    def __init__(self, key=lambda x: x):
+        self.key = key
+        self.index = {}
+        self.serial = 0
+
+    def append(self, item):
+        k = self.key(item)
+        entry = self.index.get(k)
+        if entry is not None:
+            self.index[k] = (entry[0], item)
+            return
+        self.serial += 1
+        self.index[k] = (self.serial, item)
+        self.order.append((self.serial, k))
+
+    def pop(self):
+        while True:
+            serial, k = self._next()
+            entry = self.index.get(k)
+            if entry is not None and entry[0] == serial:
+                del self.index[k]
+                return entry[1]
+
+    def remove(self, item):
+        del self.index[self.key(item)]
+
+    def has_key(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, item):
+        return self.key(item) in self.index
+
+    def __getitem__(self, item):
+        return self.index[self.key(item)][1]
+
+
+class IndexedStack(IndexedQueue):
+
+    """A Last-In-First-Out IndexedQueue."""
+
+    def __init__(self, key=lambda x: x):
+        IndexedQueue.__init__(self, key)
+        self.order = []
+
+    def _next(self):
+        return self.order.pop()
+
+
+class IndexedFIFOQueue(IndexedQueue):
+
+    """A First-In-First-Out IndexedQueue."""
+
+    def __init__(self, key=lambda x: x):
+        IndexedQueue.__init__(self, key)
+        self.order = collections.deque()
+
+    def _next(self):
+        return self.order.popleft()
 
 
 class PriorityQueue(Queue):
@@ -610,6 +686,114 @@ class PriorityQueue(Queue):
         if self._A[key] > 0:
             return key
 
+
+class IndexedPriorityQueue(Queue):
+
+    """A min-first priority queue on a binary heap with a hash index of the
+    heap position of each key(item), so that, unlike PriorityQueue, an item
+    can be looked up, removed or replaced by a better one in O(log n), and
+    the heap only ever holds one entry per key.
+        q.append(item)  -- add item, or replace the queued item with the key
+                           of item if item has a lower f (decrease-key)
+        q[item]         -- the queued item with the key of item
+        del q[item]     -- remove the queued item with the key of item
+        q.has_key(key)  -- is an item with this key queued?
+    Entries are ordered by (f(item), item) like in PriorityQueue; items that
+    compare equal should have the same key. With tie, a function of an item
+    and the number of items appended before it, entries are ordered by
+    (f(item), tie(item, count)) instead and the items are never compared,
+    e.g. tie=lambda item, count: count breaks ties first-in-first-out.
+    Only order=min is supported; negate f for a max-first queue."""
+
+    def __init__(self, order=min, f=lambda x: x, key=lambda x: x, tie=None):
+        if order is not min:
+            raise ValueError('IndexedPriorityQueue only supports order=min, not {!r}'.format(order))
+        self.heap = []
+        self.position = {}
+        self.f = f
+        self.key = key
+        self.tie = tie
+        self.count = 0
+
+    def append(self, item):
+        k = self.key(item)
+        if self.tie is None:
+            entry = ((self.f(item), item), item, k)
+        else:
+            entry = ((self.f(item), self.tie(item, self.count)), item, k)
+        self.count += 1
+        i = self.position.get(k)
+        if i is None:
+            self.heap.append(entry)
+            self.position[k] = len(self.heap) - 1
+            self._sift_up(len(self.heap) - 1)
+        elif entry[0][0] < self.heap[i][0][0]:
+            self.heap[i] = entry
+            self._sift_up(i)
+
+    def pop(self):
+        return self._remove(0)
+
+    def _remove(self, i):
+        heap = self.heap
+        entry = heap[i]
+        last = heap.pop()
+        del self.position[entry[2]]
+        if i < len(heap):
+            heap[i] = last
+            self.position[last[2]] = i
+            self._sift_up(i)
+            self._sift_down(self.position[last[2]])
+        return entry[1]
+
+    def _sift_up(self, i):
+        heap, position = self.heap, self.position
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if entry[0] < heap[parent][0]:
+                heap[i] = heap[parent]
+                position[heap[i][2]] = i
+                i = parent
+            else:
+                break
+        heap[i] = entry
+        position[entry[2]] = i
+
+    def _sift_down(self, i):
+        heap, position = self.heap, self.position
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if heap[child][0] < entry[0]:
+                heap[i] = heap[child]
+                position[heap[i][2]] = i
+                i = child
+            else:
+                break
+        heap[i] = entry
+        position[entry[2]] = i
+
+    def has_key(self, key):
+        return key in self.position
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return self.key(item) in self.position
+
+    def __getitem__(self, item):
+        return self.heap[self.position[self.key(item)]][1]
+
+    def __delitem__(self, item):
+        self._remove(self.position[self.key(item)])
+
 # ______________________________________________________________________________
 # Useful Shorthands
 
@@ -0,0 +1,140 @@
+"""Benchmark the searches of run_search over generated air cargo problems of growing size
+
+Each run solves a problem from `air_cargo_generated` with one of the `run_search.SEARCHES`
+entries and records the wall time, the expansions, goal tests and new nodes, the plan
+length, the time spent in the heuristic and the peak memory traced by tracemalloc.  The
+heuristic cache is emptied before each run so every run starts cold.  The records are
+written as a JSON list, e.g.
+
+    python benchmark.py -s 9 18 -n 2,2,2 3,3,3 4,2,4 --seed 1 -o results.json
+
+Tracing memory slows the search down; pass --no-memory for wall times comparable to run_search.
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from timeit import default_timer as timer
+
+import heuristic_cache
+from my_air_cargo_problems import air_cargo_generated
+from run_search import SEARCHES, PrintableProblem
+
+DEFAULT_SIZES = [(2, 2, 2), (3, 2, 3), (3, 3, 3), (4, 2, 4)]
+DEFAULT_SEARCHES = [9, 10, 18]
+
+
+class TimedHeuristic():
+    """Heuristic wrapper counting the calls and the time spent in them"""
+
+    def __init__(self, heuristic):
+        """
+        :param heuristic: function of a Node
+        """
+        self.heuristic = heuristic
+        self.calls = 0
+        self.time = 0.0
+
+    def __call__(self, node):
+        start = timer()
+        value = self.heuristic(node)
+        self.time += timer() - start
+        self.calls += 1
+        return value
+
+
+def parse_size(text: str) -> tuple:
+    """ the (cargos, planes, airports) of a size written 'C,P,A'
+
+    :param text: str
+    :return: tuple of three int
+    """
+    size = tuple(int(n) for n in text.split(','))
+    if len(size) != 3:
+        raise argparse.ArgumentTypeError('a size is written cargos,planes,airports, not {!r}'.format(text))
+    return size
+
+
+def benchmark_run(size: tuple, search: int, seed=None, measure_memory=True) -> dict:
+    """ solve one generated problem with one of the SEARCHES and record the statistics
+
+    :param size: tuple, the numbers of cargos, planes and airports
+    :param search: int, the 1-based index of the search in SEARCHES
+    :param seed: None or int, passed to air_cargo_generated
+    :param measure_memory: bool, whether to trace the peak memory of the run
+    :return: dict
+    """
+    sname, search_function, h = SEARCHES[search - 1]
+    problem = air_cargo_generated(*size, seed=seed)
+    heuristic = TimedHeuristic(getattr(problem, h)) if h else None
+    stats = problem.pruning_stats
+    cache = heuristic_cache.heuristic_cache
+    cache.clear()
+    cache.reset_stats()
+    ip = PrintableProblem(problem)
+    if measure_memory:
+        tracemalloc.start()
+    start = timer()
+    node = search_function(ip, heuristic) if heuristic is not None else search_function(ip)
+    elapsed = timer() - start
+    peak_memory = None
+    if measure_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'cargos': size[0], 'planes': size[1], 'airports': size[2], 'seed': seed,
+            'fluents': len(problem.state_map), 'actions': len(problem.actions_list),
+            'pruned_actions': stats['unreachable_actions'] + stats['irrelevant_actions'] if stats else 0,
+            'pruned_fluents': stats['pruned_fluents'] if stats else 0,
+            'search': search, 'search_name': sname, 'heuristic': h or None,
+            'solved': hasattr(node, 'solution'),
+            'plan_length': len(node.solution()) if hasattr(node, 'solution') else None,
+            'wall_time': elapsed,
+            'expansions': ip.succs, 'goal_tests': ip.goal_tests, 'new_nodes': ip.states,
+            'heuristic_calls': heuristic.calls if heuristic else 0,
+            'heuristic_time': heuristic.time if heuristic else 0.0,
+            'cache_hits': cache.hits, 'cache_misses': cache.misses,
+            'peak_memory': peak_memory}
+
+
+def benchmark(sizes: list, searches: list, seed=None, measure_memory=True, log=None) -> list:
+    """ run every search over every size, smallest problems first
+
+    :param sizes: list of (cargos, planes, airports) tuples
+    :param searches: list of 1-based indices in SEARCHES
+    :param seed: None or int, passed to air_cargo_generated
+    :param measure_memory: bool, whether to trace the peak memory of each run
+    :param log: None or file, where to print one line per run
+    :return: list of dict, one per run
+    """
+    results = []
+    for size in sizes:
+        for search in searches:
+            record = benchmark_run(size, search, seed, measure_memory)
+            results.append(record)
+            if log is not None:
+                print('{cargos}x{planes}x{airports}  {search_name} {heuristic}: {wall_time:.3f}s  '
+                      '{expansions} expansions  plan {plan_length}'.format(**record), file=log)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark search methods over generated air cargo problems.")
+    parser.add_argument('-n', '--sizes', nargs='+', type=parse_size, default=DEFAULT_SIZES, metavar='C,P,A',
+                        help="Problem sizes as cargos,planes,airports. Default: {}".format(
+                            ' '.join(','.join(map(str, size)) for size in DEFAULT_SIZES)))
+    parser.add_argument('-s', '--searches', nargs='+', choices=range(1, len(SEARCHES)+1), type=int,
+                        default=DEFAULT_SEARCHES, metavar='',
+                        help="Indices of the search algorithms in run_search. Default: {}".format(DEFAULT_SEARCHES))
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed of the random problems. Without it the problems are structured.")
+    parser.add_argument('--no-memory', action='store_true', help="Do not trace the peak memory.")
+    parser.add_argument('-o', '--output', default=None, help="JSON file for the results. Default: stdout.")
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes, args.searches, args.seed, not args.no_memory, log=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
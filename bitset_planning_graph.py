@@ -0,0 +1,325 @@
+"""Bitset-backed planning graph engine.
+
+Every fluent of ``problem.state_map`` gets an integer id ``i``.  Its positive
+literal is bit ``i`` and its negative literal is bit ``n + i`` of a literal
+mask, ``n`` being the number of fluents.  Every ground action of
+``problem.actions_list`` gets an action id, followed by one persistence (no-op)
+action per literal, so no-op ``len(actions_list) + l`` persists literal ``l``.
+
+Levels are plain python ints used as bitsets and mutex relations are kept as
+one int mask per node, so building a level is a handful of integer operations
+instead of creating, hashing and comparing ``PgNode`` objects.  The graph has
+the same levels, mutexes and ``h_levelsum`` as ``my_planning_graph.PlanningGraph``.
+"""
+from aimacode.planning import Action
+from aimacode.search import Problem
+from aimacode.utils import Expr
+from lp_utils import fluent_bit, pack_state
+
+
+def bits(mask: int):
+    """iterate over the indices of the bits set in mask, lowest first
+
+    :param mask: int
+    :return: generator of int
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CompiledProblem():
+    """State-independent bitset view of a planning problem
+
+    Built once per problem (see `compile_problem`) and shared by every
+    BitsetPlanningGraph created for that problem.
+    """
+
+    def __init__(self, problem: Problem):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        Instance variables calculated:
+            fluents: list of expr, the fluent for each fluent id (same order as problem.state_map)
+            index: dict of expr -> fluent id
+            actions: list of Action, the ground actions of the problem (no-ops are implicit)
+            pre: list of int, literal mask of the preconditions of each action id
+            eff: list of int, literal mask of the effects of each action id
+            persistent: int, action mask of the actions whose preconditions equal their effects
+            adders: list of int, action mask of the actions having each literal as effect
+            needers: list of int, action mask of the actions having each literal as precondition
+            static_mutex: list of int, action mask of the actions that have inconsistent effects or
+                interference with each action id; these do not depend on the level
+        """
+        self.fluents = list(problem.state_map)
+        self.n = len(self.fluents)
+        self.index = {fluent: i for i, fluent in enumerate(self.fluents)}
+        self.actions = list(problem.actions_list)
+        self.num_literals = 2 * self.n
+        self.num_actions = len(self.actions) + self.num_literals
+        self.pos_mask = (1 << self.n) - 1
+
+        self.pre = []
+        self.eff = []
+        for action in self.actions:
+            self.pre.append(self.literal_mask(action.precond_pos, action.precond_neg))
+            self.eff.append(self.literal_mask(action.effect_add, action.effect_rem))
+        for literal in range(self.num_literals):
+            self.pre.append(1 << literal)
+            self.eff.append(1 << literal)
+
+        self.persistent = 0
+        self.adders = [0] * self.num_literals
+        self.needers = [0] * self.num_literals
+        for a in range(self.num_actions):
+            if self.pre[a] == self.eff[a]:
+                self.persistent |= 1 << a
+            for literal in bits(self.eff[a]):
+                self.adders[literal] |= 1 << a
+            for literal in bits(self.pre[a]):
+                self.needers[literal] |= 1 << a
+
+        self.static_mutex = []
+        for a in range(self.num_actions):
+            mutex = 0
+            # inconsistent effects and interference (effect of a negates a precondition of b)
+            for literal in bits(self.eff[a]):
+                negated = self.negate(literal)
+                mutex |= self.adders[negated] | self.needers[negated]
+            # interference (precondition of a negated by an effect of b)
+            for literal in bits(self.pre[a]):
+                mutex |= self.adders[self.negate(literal)]
+            self.static_mutex.append(mutex & ~(1 << a))
+        self._noops = {}
+
+    def literal_mask(self, pos_list, neg_list) -> int:
+        """literal mask of positive and negative fluent lists
+
+        :param pos_list: list of expr
+        :param neg_list: list of expr
+        :return: int
+        """
+        mask = 0
+        for fluent in pos_list:
+            mask |= 1 << self.index[fluent]
+        for fluent in neg_list:
+            mask |= 1 << (self.n + self.index[fluent])
+        return mask
+
+    def state_literals(self, state) -> int:
+        """literal mask of a state, one positive or negative literal per fluent
+
+        :param state: PackedState (or str in form TFTTFF... representing fluent states)
+        :return: int
+        """
+        packed = pack_state(state)
+        pos = 0
+        for i in range(self.n):
+            if packed & fluent_bit(i, self.n):
+                pos |= 1 << i
+        return pos | ((~pos & self.pos_mask) << self.n)
+
+    def negate(self, literal: int) -> int:
+        """id of the negation of a literal
+
+        :param literal: int
+        :return: int
+        """
+        return literal + self.n if literal < self.n else literal - self.n
+
+    def literal(self, literal: int):
+        """the (symbol, is_pos) pair of a literal id, as in PgNode_s
+
+        :param literal: int
+        :return: tuple of (expr, bool)
+        """
+        if literal < self.n:
+            return self.fluents[literal], True
+        return self.fluents[literal - self.n], False
+
+    def action(self, a: int) -> Action:
+        """the Action of an action id; no-op actions are only created on demand
+
+        :param a: int
+        :return: Action
+        """
+        if a < len(self.actions):
+            return self.actions[a]
+        if a not in self._noops:
+            fluent, is_pos = self.literal(a - len(self.actions))
+            if is_pos:
+                noop = Action(Expr('Noop_pos', fluent), ([fluent], []), ([fluent], []))
+            else:
+                noop = Action(Expr('Noop_neg', fluent), ([], [fluent]), ([], [fluent]))
+            self._noops[a] = noop
+        return self._noops[a]
+
+
+def compile_problem(problem: Problem) -> CompiledProblem:
+    """return the CompiledProblem for a problem, compiling it on first use
+
+    The compiled form is cached on the problem object itself so the masks are
+    computed only once per problem.
+
+    :param problem: PlanningProblem
+    :return: CompiledProblem
+    """
+    compiled = getattr(problem, '_bitset_compiled', None)
+    if compiled is None:
+        compiled = CompiledProblem(problem)
+        problem._bitset_compiled = compiled
+    return compiled
+
+
+class BitsetPlanningGraph():
+    """
+    A planning graph as described in chapter 10 of the AIMA text, with the
+    levels stored as bitsets over the literal and action ids of a CompiledProblem.
+    """
+
+    def __init__(self, problem: Problem, state, serial_planning=True):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        :param state: PackedState (or str in form TFTTFF... representing fluent states)
+        :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+        Instance variable calculated:
+            compiled: CompiledProblem shared by all graphs of the problem
+            s_levels: list of int, literal mask of each S-level
+            a_levels: list of int, action mask of each A-level
+            s_mutex: list of dict of literal id -> literal mask of its mutex siblings, one per S-level
+                (literals without mutex siblings are left out)
+            a_mutex: list of dict of action id -> action mask of its mutex siblings, one per A-level
+                (actions without mutex siblings are left out)
+        """
+        self.problem = problem
+        self.serial = serial_planning
+        self.compiled = compile_problem(problem)
+        self.s_levels = []
+        self.a_levels = []
+        self.s_mutex = []
+        self.a_mutex = []
+        self.create_graph(state)
+
+    def create_graph(self, state):
+        """ build the planning graph from S0 until the last two S levels contain the same literals and mutexes
+
+        :param state: PackedState or str
+        :return:
+            fills s_levels, a_levels, s_mutex and a_mutex
+        """
+        if self.s_levels or self.a_levels:
+            raise Exception(
+                'Planning Graph already created; construct a new planning graph for each new state in the planning sequence')
+        self.s_levels.append(self.compiled.state_literals(state))
+        # no mutexes at the first level
+        self.s_mutex.append({})
+        level = 0
+        leveled = False
+        while not leveled:
+            self.add_action_level(level)
+            level += 1
+            self.add_literal_level(level)
+            if self.s_levels[level] == self.s_levels[level - 1] and self.s_mutex[level] == self.s_mutex[level - 1]:
+                leveled = True
+
+    def add_action_level(self, level: int):
+        """ add an A level and its mutexes to the graph
+
+        :param level: int
+        :return:
+            appends to a_levels and a_mutex
+        """
+        cp = self.compiled
+        s_level = self.s_levels[level]
+        s_mutex = self.s_mutex[level]
+        a_level = 0
+        for a in range(cp.num_actions):
+            if cp.pre[a] & s_level == cp.pre[a]:
+                a_level |= 1 << a
+
+        serial = a_level & ~cp.persistent if self.serial else 0
+        a_mutex = {}
+        for a in bits(a_level):
+            mutex = cp.static_mutex[a]
+            if serial >> a & 1:
+                mutex |= serial
+            # competing needs: a precondition of b is mutex with a precondition of a
+            needs_mutex = 0
+            for literal in bits(cp.pre[a]):
+                needs_mutex |= s_mutex.get(literal, 0)
+            for literal in bits(needs_mutex):
+                mutex |= cp.needers[literal]
+            mutex &= a_level & ~(1 << a)
+            if mutex:
+                a_mutex[a] = mutex
+        self.a_levels.append(a_level)
+        self.a_mutex.append(a_mutex)
+
+    def add_literal_level(self, level: int):
+        """ add an S level and its mutexes to the graph
+
+        :param level: int
+        :return:
+            appends to s_levels and s_mutex
+        """
+        cp = self.compiled
+        a_level = self.a_levels[level - 1]
+        a_mutex = self.a_mutex[level - 1]
+        s_level = 0
+        for a in bits(a_level):
+            s_level |= cp.eff[a]
+
+        s_mutex = {}
+        for literal in bits(s_level):
+            mutex = 0
+            negated = cp.negate(literal)
+            if s_level >> negated & 1:
+                mutex |= 1 << negated
+            # inconsistent support: every producer of the other literal is mutex with every producer of this one
+            common = -1
+            for a in bits(cp.adders[literal] & a_level):
+                common &= a_mutex.get(a, 0)
+            candidates = 0
+            for a in bits(common):
+                candidates |= cp.eff[a]
+            for other in bits(candidates & s_level & ~(1 << literal)):
+                if cp.adders[other] & a_level & ~common == 0:
+                    mutex |= 1 << other
+            if mutex:
+                s_mutex[literal] = mutex
+        self.s_levels.append(s_level)
+        self.s_mutex.append(s_mutex)
+
+    def is_mutex_s(self, level: int, literal1: int, literal2: int) -> bool:
+        """Boolean test for mutual exclusion of two literals of an S-level
+
+        :param level: int
+        :param literal1: int
+        :param literal2: int
+        :return: bool
+        """
+        return bool(self.s_mutex[level].get(literal1, 0) >> literal2 & 1)
+
+    def is_mutex_a(self, level: int, action1: int, action2: int) -> bool:
+        """Boolean test for mutual exclusion of two actions of an A-level
+
+        :param level: int
+        :param action1: int
+        :param action2: int
+        :return: bool
+        """
+        return bool(self.a_mutex[level].get(action1, 0) >> action2 & 1)
+
+    def h_levelsum(self) -> int:
+        """The sum of the level costs of the individual goals (admissible if goals independent)
+
+        :return: int
+        """
+        level_sum = 0
+        for goal in self.problem.goal:
+            goal_bit = 1 << self.compiled.index[goal]
+            for level, s_level in enumerate(self.s_levels):
+                if s_level & goal_bit:
+                    level_sum += level
+                    break
+        return level_sum
@@ -1,4 +1,3 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, breadth_first_search, astar_search, depth_first_graph_search,
@@ -6,19 +5,22 @@ from aimacode.search import (
 )
 from aimacode.utils import expr
 from lp_utils import (
-    FluentState, encode_state, decode_state
+    FluentState, PackedState, encode_packed_state, fluent_bits, pack_state,
+    SuccessorGenerator, GoalMask,
 )
+from heuristic_cache import cached_heuristic
 from my_planning_graph import PlanningGraph
 from run_search import run_search
 
-from functools import lru_cache
-
 
 class HaveCakeProblem(Problem):
     def __init__(self, initial: FluentState, goal: list):
         self.state_map = initial.pos + initial.neg
-        Problem.__init__(self, encode_state(initial, self.state_map), goal=goal)
+        self.fluent_bits = fluent_bits(self.state_map)
+        Problem.__init__(self, encode_packed_state(initial, self.state_map), goal=goal)
         self.actions_list = self.get_actions()
+        self.successors = SuccessorGenerator(self.actions_list, self.fluent_bits)
+        self.goal_mask = GoalMask(goal, self.fluent_bits)
 
     def get_actions(self):
         precond_pos = [expr("Have(Cake)")]
@@ -37,62 +39,56 @@ class HaveCakeProblem(Problem):
                              [effect_add, effect_rem])
         return [eat_action, bake_action]
 
-    def actions(self, state: str) -> list:  # of Action
-        possible_actions = []
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in kb.clauses:
-                    is_possible = False
-            for clause in action.precond_neg:
-                if clause in kb.clauses:
-                    is_possible = False
-            if is_possible:
-                possible_actions.append(action)
-        return possible_actions
-
-    def result(self, state: str, action: Action):
-        new_state = FluentState([], [])
-        old_state = decode_state(state, self.state_map)
-        for fluent in old_state.pos:
-            if fluent not in action.effect_rem:
-                new_state.pos.append(fluent)
-        for fluent in action.effect_add:
-            if fluent not in new_state.pos:
-                new_state.pos.append(fluent)
-        for fluent in old_state.neg:
-            if fluent not in action.effect_add:
-                new_state.neg.append(fluent)
-        for fluent in action.effect_rem:
-            if fluent not in new_state.neg:
-                new_state.neg.append(fluent)
-        return encode_state(new_state, self.state_map)
-
-    def goal_test(self, state: str) -> bool:
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+    def actions(self, state: PackedState) -> list:  # of Action
+        return self.successors.applicable(pack_state(state))
+
+    def result(self, state: PackedState, action: Action) -> PackedState:
+        _, _, add, rem = self.successors.masks(action)
+        return PackedState(pack_state(state) & ~rem | add)
+
+    def goal_test(self, state: PackedState) -> bool:
+        return self.goal_mask.test(pack_state(state))
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
         h_const = 1
         return h_const
 
-    @lru_cache(maxsize=8192)
+    @cached_heuristic
     def h_pg_levelsum(self, node: Node):
         # uses the planning graph level-sum heuristic calculated
         # from this node to the goal
         # requires implementation in PlanningGraph
-        pg = PlanningGraph(self, node.state)
+        pg = PlanningGraph(self, node.state, lazy=True)
         pg_levelsum = pg.h_levelsum()
         return pg_levelsum
 
-    @lru_cache(maxsize=8192)
+    @cached_heuristic
+    def h_pg_maxlevel(self, node: Node):
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_maxlevel()
+
+    @cached_heuristic
+    def h_pg_setlevel(self, node: Node):
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_setlevel()
+
+    @cached_heuristic
+    def h_pg_add(self, node: Node):
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_add()
+
+    @cached_heuristic
+    def h_pg_max(self, node: Node):
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_max()
+
+    @cached_heuristic
+    def h_pg_ff(self, node: Node):
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_ff()
+
+    @cached_heuristic
     def h_ignore_preconditions(self, node: Node):
         # not implemented
         count = 0
@@ -0,0 +1,137 @@
+"""GraphPlan (Blum & Furst 1997, Russell-Norvig 3rd Ed 10.3.4 or 2nd Ed 11.4)
+
+Extracts a plan directly from the leveled planning graph of my_planning_graph
+by searching backward from the goal level over sets of non-mutex actions.
+"""
+from aimacode.search import Node, Problem
+from my_planning_graph import PlanningGraph
+
+
+class GraphPlan():
+    """GraphPlan solver for a planning problem (AirCargoProblem, HaveCakeProblem, ...)
+
+    Every failed attempt to achieve a set of subgoals at a level is memoized in
+    the `nogoods` table so that it is never searched again, both within one
+    extraction and across the extractions done as the graph grows.
+    """
+
+    def __init__(self, problem: Problem, serial_planning=True):
+        """
+        :param problem: PlanningProblem
+        :param serial_planning: bool (whether or not only one action can occur at a time)
+        Instance variables calculated:
+            pg: PlanningGraph of the initial state, grown one level at a time
+            nogoods: set of (level, frozenset of (symbol, is_pos)) subgoal sets known to be unachievable
+        """
+        self.problem = problem
+        self.pg = PlanningGraph(problem, problem.initial, serial_planning, lazy=True)
+        self.nogoods = set()
+
+    def solve(self):
+        """ extend the graph and try to extract a plan at each level until one is found or
+        the leveled-off termination test proves that there is none
+
+        :return: list of list of Action (the non-persistent actions of each step) or None
+        """
+        goals = frozenset((goal, True) for goal in self.problem.goal)
+        if not self.pg.expand(goals, mutex=True):
+            return None
+        level = len(self.pg.s_masks) - 1
+        leveled_at = None
+        nogoods_at_leveled = None
+        while True:
+            plan = self.extract(goals, level)
+            if plan is not None:
+                return plan
+            if self.pg.leveled:
+                # once the graph has leveled off at level n, if an extension stage adds no
+                # new nogood at level n the problem has no solution
+                if leveled_at is None:
+                    leveled_at = level
+                count = sum(1 for nogood_level, _ in self.nogoods if nogood_level == leveled_at)
+                if count == nogoods_at_leveled:
+                    return None
+                nogoods_at_leveled = count
+            self.pg.add_level(mutex=True)
+            level += 1
+
+    def extract(self, goals: frozenset, level: int):
+        """ search backward for a plan achieving goals at level
+
+        :param goals: frozenset of (symbol, is_pos)
+        :param level: int
+        :return: list of list of Action or None
+        """
+        if level == 0:
+            return [] if all(self.pg.literal_node(0, goal) is not None for goal in goals) else None
+        if (level, goals) in self.nogoods:
+            return None
+        goal_nodes = []
+        for goal in goals:
+            node = self.pg.literal_node(level, goal)
+            if node is None:
+                self.nogoods.add((level, goals))
+                return None
+            goal_nodes.append(node)
+        if any(n1.is_mutex(n2) for i, n1 in enumerate(goal_nodes) for n2 in goal_nodes[i + 1:]):
+            self.nogoods.add((level, goals))
+            return None
+        # goals with the fewest achievers first
+        goal_nodes.sort(key=lambda node: len(node.parents))
+        plan = self.assign(goal_nodes, 0, [], set(), level)
+        if plan is None:
+            self.nogoods.add((level, goals))
+        return plan
+
+    def assign(self, goal_nodes: list, index: int, chosen: list, achieved: set, level: int):
+        """ choose non-mutex achievers in A-level `level - 1` for the goals from `index` on,
+        then recurse on the preconditions of the chosen actions
+
+        :param goal_nodes: list of PgNode_s of the goals at level
+        :param index: int, the next goal to achieve
+        :param chosen: list of PgNode_a already chosen
+        :param achieved: set of PgNode_s achieved by the chosen actions
+        :param level: int
+        :return: list of list of Action or None
+        """
+        if index == len(goal_nodes):
+            subgoals = frozenset((node.symbol, node.is_pos) for action in chosen for node in action.parents)
+            plan = self.extract(subgoals, level - 1)
+            if plan is None:
+                return None
+            return plan + [[action.action for action in chosen if not action.is_persistent]]
+        goal = goal_nodes[index]
+        if goal in achieved:
+            return self.assign(goal_nodes, index + 1, chosen, achieved, level)
+        # persistence actions first, they do not add any new subgoal
+        for action in sorted(goal.parents, key=lambda node: not node.is_persistent):
+            if any(action.is_mutex(other) for other in chosen):
+                continue
+            plan = self.assign(goal_nodes, index + 1, chosen + [action], achieved | action.children, level)
+            if plan is not None:
+                return plan
+        return None
+
+
+def graphplan_search(problem: Problem, serial_planning=True):
+    """Solve a planning problem with GraphPlan, returning the goal Node like the search
+    functions of aimacode.search (or None when there is no plan).  The steps of a
+    parallel plan are linearized, any order of a step's non-mutex actions being valid.
+
+    :param problem: PlanningProblem
+    :param serial_planning: bool
+    :return: Node or None
+    """
+    steps = GraphPlan(problem, serial_planning).solve()
+    if steps is None:
+        return None
+    node = Node(problem.initial)
+    for step in steps:
+        for action in step:
+            node = node.child_node(problem, action)
+    return node
+
+
+def parallel_graphplan_search(problem: Problem):
+    """GraphPlan without the serial planning constraint (see graphplan_search)"""
+    return graphplan_search(problem, serial_planning=False)
@@ -0,0 +1,219 @@
+"""Bounded cache of heuristic values keyed by problem fingerprint and state
+
+The heuristic methods of the planning problems are decorated with
+`cached_heuristic`, which stores their values in the module-level cache under
+(problem fingerprint, heuristic name, state).  Unlike ``functools.lru_cache``
+on the method, the key holds neither the problem nor the search node (whose
+parent links keep the whole search tree alive), and nodes sharing a state
+share the entry.  The size and eviction policy (LRU or ARC) are set with
+`configure_heuristic_cache`; `run_search` prints the hit, miss and eviction
+counts of each run.
+"""
+from collections import OrderedDict
+from functools import wraps
+
+from aimacode.search import Problem
+
+
+class LRUCache():
+    """Bounded mapping evicting the least recently used entry, with hit/miss/eviction counts"""
+
+    def __init__(self, maxsize=8192):
+        """
+        :param maxsize: int, the number of values kept
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.reset_stats()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def reset_stats(self):
+        """ set the hit, miss and eviction counts back to zero """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """ the hit, miss and eviction counts and the number of values kept
+
+        :return: dict
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self)}
+
+    def clear(self):
+        """ drop every value (the counts are kept) """
+        self.entries.clear()
+
+    def get(self, key, compute):
+        """ the value of a key, computed with compute() and stored on a miss
+
+        :param key: hashable
+        :param compute: function without arguments returning the value
+        :return: the value
+        """
+        entries = self.entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        value = compute()
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+
+class ARCCache(LRUCache):
+    """Bounded mapping with Adaptive Replacement Cache eviction (Megiddo & Modha 2003)
+
+    Values seen once (t1) and values seen again (t2) are kept in two LRU lists, with the
+    keys recently evicted from each remembered in two ghost lists (b1, b2).  A miss on a
+    ghost key moves the target size p of t1, so the cache adapts between recency and
+    frequency: a search revisiting states keeps them in t2 while a sweep over new states
+    only cycles through t1.
+    """
+
+    def __init__(self, maxsize=8192):
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.p = 0
+        LRUCache.__init__(self, maxsize)
+
+    def __len__(self):
+        return len(self.t1) + len(self.t2)
+
+    def clear(self):
+        for entries in (self.t1, self.t2, self.b1, self.b2):
+            entries.clear()
+        self.p = 0
+
+    def replace(self, key):
+        """ evict the LRU value of t1 or t2, according to the target size p, into its ghost list
+
+        :param key: the key being inserted
+        """
+        if self.t1 and (len(self.t1) > self.p or (key in self.b2 and len(self.t1) == self.p)):
+            old, _ = self.t1.popitem(last=False)
+            self.b1[old] = None
+        else:
+            old, _ = self.t2.popitem(last=False)
+            self.b2[old] = None
+        self.evictions += 1
+
+    def get(self, key, compute):
+        if key in self.t1:
+            self.hits += 1
+            value = self.t2[key] = self.t1.pop(key)
+            return value
+        if key in self.t2:
+            self.hits += 1
+            self.t2.move_to_end(key)
+            return self.t2[key]
+        self.misses += 1
+        value = compute()
+        size = self.maxsize
+        if key in self.b1:
+            self.p = min(size, self.p + max(len(self.b2) // len(self.b1), 1))
+            self.replace(key)
+            del self.b1[key]
+            self.t2[key] = value
+        elif key in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
+            self.replace(key)
+            del self.b2[key]
+            self.t2[key] = value
+        else:
+            if len(self.t1) + len(self.b1) >= size:
+                if len(self.t1) < size:
+                    self.b1.popitem(last=False)
+                    self.replace(key)
+                else:
+                    self.t1.popitem(last=False)
+                    self.evictions += 1
+            elif len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) >= size:
+                if len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) >= 2 * size:
+                    self.b2.popitem(last=False)
+                if len(self) >= size:
+                    self.replace(key)
+            self.t1[key] = value
+        return value
+
+
+CACHE_POLICIES = {'lru': LRUCache, 'arc': ARCCache}
+
+heuristic_cache = LRUCache()
+
+
+def configure_heuristic_cache(maxsize=8192, policy='lru'):
+    """ replace the heuristic cache by an empty one
+
+    :param maxsize: int, the number of heuristic values kept
+    :param policy: str, the eviction policy, 'lru' or 'arc'
+    :return: the new cache
+    """
+    global heuristic_cache
+    heuristic_cache = CACHE_POLICIES[policy](maxsize)
+    return heuristic_cache
+
+
+class ProblemFingerprint():
+    """The definition of a problem as a cache key: compared in full, with its hash computed once"""
+    __slots__ = ('definition', 'hash')
+
+    def __init__(self, definition: tuple):
+        """
+        :param definition: tuple, see `problem_fingerprint`
+        """
+        self.definition = definition
+        self.hash = hash(definition)
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        return self is other or (isinstance(other, ProblemFingerprint) and self.hash == other.hash and
+                                 self.definition == other.definition)
+
+
+def problem_fingerprint(problem: Problem) -> ProblemFingerprint:
+    """ a hashable summary of the definition of a problem, computed once per problem
+
+    Two problems built with the same fluents, goal and actions have equal fingerprints,
+    so they share their cached heuristic values.  The preconditions and effects of an
+    action are kept apart by polarity, and fingerprints with the same hash are still
+    compared in full.
+
+    :param problem: PlanningProblem
+    :return: ProblemFingerprint
+    """
+    fingerprint = getattr(problem, '_fingerprint', None)
+    if fingerprint is None:
+        fingerprint = ProblemFingerprint((
+            type(problem).__name__,
+            tuple(str(fluent) for fluent in problem.state_map),
+            tuple(str(goal) for goal in problem.goal),
+            tuple((str(action),
+                   tuple(str(p) for p in action.precond_pos), tuple(str(p) for p in action.precond_neg),
+                   tuple(str(e) for e in action.effect_add), tuple(str(e) for e in action.effect_rem))
+                  for action in problem.actions_list)))
+        problem._fingerprint = fingerprint
+    return fingerprint
+
+
+def cached_heuristic(method):
+    """ decorator caching the values of a heuristic method h(self, node) in the heuristic cache
+
+    :param method: function of a problem and a Node
+    :return: function
+    """
+    @wraps(method)
+    def heuristic(problem, node):
+        key = (problem_fingerprint(problem), method.__name__, node.state)
+        return heuristic_cache.get(key, lambda: method(problem, node))
+    return heuristic
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from aimacode.logic import associate
 from aimacode.utils import expr
 
@@ -18,6 +20,359 @@ class FluentState():
         return expr(conjunctive_sentence(self.pos, []))
 
 
+class PackedState(int):
+    """ state object for planning problems as the bits of an int
+
+    Fluent i of a map of n fluents is bit n - 1 - i (see `fluent_bit`): the first fluent is
+    the most significant, so packed states order like their T/F strings.  One more bit is set
+    just above the fluents, so the number of fluents (len) and the T/F string (str) are kept
+    and the packed states of different problems never compare equal.  The T/F strings are
+    only needed at the edges, for display and by callers still passing strings.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_string(cls, state: str) -> 'PackedState':
+        """ pack a string of T/F
+
+        :param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+        :return: PackedState
+        """
+        bits = 1
+        for char in state:
+            bits = bits << 1 | (char == 'T')
+        return cls(bits)
+
+    @classmethod
+    def from_fluents(cls, fluents: int, num_fluents: int) -> 'PackedState':
+        """ pack the bits of the fluents that hold
+
+        :param fluents: int, the `fluent_bit` of every fluent that holds
+        :param num_fluents: int, the number of fluents of the problem
+        :return: PackedState
+        """
+        return cls(fluents | 1 << num_fluents)
+
+    def __len__(self):
+        return self.bit_length() - 1
+
+    @property
+    def fluents(self) -> int:
+        """the bits of the fluents that hold, without the length bit"""
+        return int(self) ^ (1 << len(self))
+
+    def holds(self, idx: int) -> bool:
+        """ test whether fluent idx of the fluent map holds
+
+        :param idx: int
+        :return: bool
+        """
+        return bool(self >> (len(self) - 1 - idx) & 1)
+
+    def __str__(self):
+        return bin(self)[3:].replace('1', 'T').replace('0', 'F')
+
+    def __repr__(self):
+        return 'PackedState({!r})'.format(str(self))
+
+
+def fluent_bit(idx: int, num_fluents: int) -> int:
+    """ the bit of fluent idx of a map of num_fluents fluents in a PackedState
+
+    :param idx: int
+    :param num_fluents: int
+    :return: int
+    """
+    return 1 << (num_fluents - 1 - idx)
+
+
+def fluent_bits(fluent_map: list) -> dict:
+    """ the PackedState bit of every fluent of a map
+
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: dict of fluent -> int
+    """
+    return {fluent: fluent_bit(idx, len(fluent_map)) for idx, fluent in enumerate(fluent_map)}
+
+
+class SuccessorGenerator():
+    """ the applicable actions of packed states, found through an index of the actions by precondition
+
+    Every action is filed under one of its positive preconditions, the one the fewest actions
+    need, so only the actions filed under a fluent that holds are tested; the actions without
+    positive preconditions are always tested.  Each test is two mask operations.
+
+    The add and delete effects of the actions are compiled to masks as well, so that the result
+    of an action is two mask operations on the packed state (see `masks`).
+    """
+
+    def __init__(self, actions: list, bits: dict):
+        """
+        :param actions: list of Action
+        :param bits: dict of fluent -> PackedState bit (see `fluent_bits`)
+        Instance variables calculated:
+            pos: list of int, the mask of the positive preconditions of each action
+            neg: list of int, the mask of the negative preconditions of each action
+            add: list of int, the mask of the fluents added by each action
+            rem: list of int, the mask of the fluents removed by each action
+            action_ids: dict of Action -> action id
+            index: dict of fluent bit -> ids of the actions filed under the fluent
+            unindexed: list of the ids of the actions without positive preconditions
+        """
+        self.actions = actions
+        self.bits = bits
+        self.pos = []
+        self.neg = []
+        self.add = []
+        self.rem = []
+        self.action_ids = {}
+        need_count = defaultdict(int)
+        for action_id, action in enumerate(actions):
+            pos, neg, add, rem = self.compile(action)
+            self.pos.append(pos)
+            self.neg.append(neg)
+            self.add.append(add)
+            self.rem.append(rem)
+            self.action_ids[action] = action_id
+            for fluent in set(action.precond_pos):
+                need_count[bits[fluent]] += 1
+        self.index = defaultdict(list)
+        self.unindexed = []
+        for action_id, action in enumerate(actions):
+            if action.precond_pos:
+                key = min((bits[fluent] for fluent in action.precond_pos), key=lambda bit: (need_count[bit], bit))
+                self.index[key].append(action_id)
+            else:
+                self.unindexed.append(action_id)
+
+    def compile(self, action) -> tuple:
+        """ the precondition and effect masks of an action
+
+        :param action: Action
+        :return: tuple of int (positive preconditions, negative preconditions, added, removed)
+        """
+        bits = self.bits
+        return (sum(bits[fluent] for fluent in set(action.precond_pos)),
+                sum(bits[fluent] for fluent in set(action.precond_neg)),
+                sum(bits[fluent] for fluent in set(action.effect_add)),
+                sum(bits[fluent] for fluent in set(action.effect_rem)))
+
+    def masks(self, action) -> tuple:
+        """ the precondition and effect masks of an action of the list, as precompiled
+
+        :param action: Action
+        :return: tuple of int (positive preconditions, negative preconditions, added, removed)
+        :raises ValueError: if the action is not one of the actions of the list
+        """
+        action_id = self.action_ids.get(action)
+        if action_id is None:
+            raise ValueError('action {!s} is not an action of the problem'.format(action))
+        return self.pos[action_id], self.neg[action_id], self.add[action_id], self.rem[action_id]
+
+    def applicable(self, state: PackedState) -> list:
+        """ the actions applicable in a state, in the order of the action list
+
+        :param state: PackedState
+        :return: list of Action
+        """
+        candidates = list(self.unindexed)
+        true_fluents = state.fluents
+        index = self.index
+        while true_fluents:
+            low = true_fluents & -true_fluents
+            true_fluents ^= low
+            filed = index.get(low)
+            if filed:
+                candidates.extend(filed)
+        candidates.sort()
+        pos, neg, actions = self.pos, self.neg, self.actions
+        return [actions[action_id] for action_id in candidates
+                if state & pos[action_id] == pos[action_id] and not state & neg[action_id]]
+
+
+class GoalMask():
+    """ a conjunctive goal of positive fluents compiled to a mask of packed states"""
+
+    def __init__(self, goal: list, bits: dict):
+        """
+        :param goal: list of expr, the fluents required for the goal test
+        :param bits: dict of fluent -> PackedState bit (see `fluent_bits`)
+        Instance variables calculated:
+            mask: int, the bits of the goal fluents
+        """
+        self.mask = sum(bits[fluent] for fluent in set(goal))
+
+    def test(self, state: PackedState) -> bool:
+        """ test whether every goal fluent holds in a state
+
+        :param state: PackedState
+        :return: bool
+        """
+        return state & self.mask == self.mask
+
+
+class GoalCover():
+    """ the ignore preconditions heuristic over the goal and effect masks of a problem
+
+    Without preconditions (and without delete effects) every action can be applied at once,
+    so the cost of a state is the fewest actions whose add effects cover the goals it misses:
+    a set cover problem over the goal fluents.  The covers (the goal fluents each action adds)
+    only depend on the problem, so they are compiled once, to masks over the goals only with
+    the covers contained in another one left out.  `exact` solves the set cover with a table
+    over every subset of the goals, built on first use, for up to `table_goals` goals, and beyond
+    that by branching on the covers of the lowest missing goal, with the value of every goal set
+    met kept.  Calling the heuristic is always exact, so it stays admissible; `greedy` picks the
+    cover adding the most missing goals until none is missing (at most ln(goals) + 1 times the
+    exact value) and must be asked for explicitly.
+    """
+
+    table_goals = 12
+
+    def __init__(self, goal_mask: GoalMask, successors: SuccessorGenerator):
+        """
+        :param goal_mask: GoalMask of the problem
+        :param successors: SuccessorGenerator of the problem, giving the effect masks of the actions
+        Instance variables calculated:
+            goal_bits: list of int, the PackedState bit of each goal fluent, goal i being bit i of a goal set
+            covers: list of int, the goal sets added by the actions, none a subset of another
+            coverable: int, the goal set added by some action
+            known: dict of goal set -> fewest covers, the goal sets solved beyond `table_goals` goals
+        """
+        mask = goal_mask.mask
+        self.goal_bits = [1 << idx for idx in range(mask.bit_length()) if mask >> idx & 1]
+        covers = set()
+        for add in successors.add:
+            cover = self.goal_set(add)
+            if cover:
+                covers.add(cover)
+        self.covers = sorted((cover for cover in covers
+                              if not any(cover != other and cover & other == cover for other in covers)),
+                             reverse=True)
+        self.coverable = 0
+        for cover in self.covers:
+            self.coverable |= cover
+        self._table = None
+        self.known = {0: 0}
+
+    def goal_set(self, fluents: int) -> int:
+        """ the goals among a mask of fluents, as a goal set
+
+        :param fluents: int, mask of PackedState bits
+        :return: int, bit i set for goal i
+        """
+        goals = 0
+        for i, bit in enumerate(self.goal_bits):
+            if fluents & bit:
+                goals |= 1 << i
+        return goals
+
+    def missing(self, state: PackedState) -> int:
+        """ the goals a state misses, as a goal set
+
+        :param state: PackedState
+        :return: int
+        """
+        goals = 0
+        for i, bit in enumerate(self.goal_bits):
+            if not state & bit:
+                goals |= 1 << i
+        return goals
+
+    def __call__(self, state: PackedState):
+        """ the exact value, whatever the number of goals (see `exact`)
+
+        :param state: PackedState
+        :return: int, or infinity if an action adds none of some missing goal
+        """
+        return self.exact(state)
+
+    def exact(self, state: PackedState):
+        """ the fewest actions covering the goals a state misses
+
+        :param state: PackedState
+        :return: int, or infinity if an action adds none of some missing goal
+        """
+        missing = self.missing(state)
+        if missing & ~self.coverable:
+            return float('inf')
+        if len(self.goal_bits) > self.table_goals:
+            return self.search(missing)
+        if self._table is None:
+            self._table = self.cover_table()
+        return self._table[missing]
+
+    def search(self, goals: int) -> int:
+        """ the fewest covers containing a goal set, by branching on the covers of its lowest goal
+
+        One of the covers of the lowest goal is in every cover of the set, so trying each of them
+        with the fewest covers of the goals it leaves is exact.
+
+        :param goals: int, a goal set within `coverable`
+        :return: int
+        """
+        count = self.known.get(goals)
+        if count is None:
+            low = goals & -goals
+            count = 1 + min(self.search(goals & ~cover) for cover in self.covers if cover & low)
+            self.known[goals] = count
+        return count
+
+    def cover_table(self) -> list:
+        """ the fewest covers containing each goal set
+
+        The goal sets that are unions of k covers are found breadth first, then the value of
+        every goal set is the least value of the goal sets containing it.
+
+        :return: list of int (infinity for the goal sets no union of covers contains)
+        """
+        size = 1 << len(self.goal_bits)
+        table = [float('inf')] * size
+        table[0] = 0
+        layer = [0]
+        while layer:
+            next_layer = []
+            for union in layer:
+                for cover in self.covers:
+                    extended = union | cover
+                    if table[extended] == float('inf'):
+                        table[extended] = table[union] + 1
+                        next_layer.append(extended)
+            layer = next_layer
+        for i in range(len(self.goal_bits)):
+            bit = 1 << i
+            for goals in range(size):
+                if not goals & bit and table[goals | bit] < table[goals]:
+                    table[goals] = table[goals | bit]
+        return table
+
+    def greedy(self, state: PackedState):
+        """ the number of actions of a greedy cover of the goals a state misses
+
+        :param state: PackedState
+        :return: int, or infinity if an action adds none of some missing goal
+        """
+        missing = self.missing(state)
+        if missing & ~self.coverable:
+            return float('inf')
+        count = 0
+        while missing:
+            best = max(self.covers, key=lambda cover: bin(cover & missing).count('1'))
+            missing &= ~best
+            count += 1
+        return count
+
+
+def pack_state(state) -> PackedState:
+    """ the packed form of a state given as a string of T/F or already packed
+
+    :param state: str or PackedState
+    :return: PackedState
+    """
+    if isinstance(state, PackedState):
+        return state
+    return PackedState.from_string(state)
+
+
 def conjunctive_sentence(pos_list, neg_list):
     """ returns expr conjuntive sentence given positive and negative fluent lists
 
@@ -41,25 +396,49 @@ def encode_state(fs: FluentState, fluent_map: list) -> str:
     :param fluent_map: ordered list of possible fluents for the problem
     :return: str eg. "TFFTFT" string of mapped positive and negative fluents
     """
+    pos = set(fs.pos)
     state_tf = []
     for fluent in fluent_map:
-        if fluent in fs.pos:
+        if fluent in pos:
             state_tf.append('T')
         else:
             state_tf.append('F')
     return "".join(state_tf)
 
 
-def decode_state(state: str, fluent_map: list) -> FluentState:
-    """ decode string of T/F as fluent per mapping
+def encode_packed_state(fs: FluentState, fluent_map: list) -> PackedState:
+    """ encode fluents to a PackedState using mapping
+
+    :param fs: FluentState object
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: PackedState with the bit of fluent_map[i] set when it is in fs.pos
+    """
+    pos = set(fs.pos)
+    bits = 1
+    for fluent in fluent_map:
+        bits = bits << 1 | (fluent in pos)
+    return PackedState(bits)
+
+
+def decode_state(state, fluent_map: list) -> FluentState:
+    """ decode string of T/F (or PackedState) as fluent per mapping
 
-    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents, or PackedState
     :param fluent_map: ordered list of possible fluents for the problem
     :return: fs: FluentState object
 
     lengths of state string and fluent_map list must be the same
     """
     fs = FluentState([], [])
+    if isinstance(state, PackedState):
+        bit = 1 << len(fluent_map)
+        for fluent in fluent_map:
+            bit >>= 1
+            if state & bit:
+                fs.pos.append(fluent)
+            else:
+                fs.neg.append(fluent)
+        return fs
     for idx, char in enumerate(state):
         if char == 'T':
             fs.pos.append(fluent_map[idx])
@@ -1,19 +1,23 @@
-from aimacode.logic import PropKB
+import random
+
 from aimacode.planning import Action
 from aimacode.search import (
     Node, Problem,
 )
 from aimacode.utils import expr
 from lp_utils import (
-    FluentState, encode_state, decode_state,
+    FluentState, PackedState, encode_state, encode_packed_state, fluent_bits, pack_state,
+    SuccessorGenerator, GoalMask, GoalCover,
 )
+from heuristic_cache import cached_heuristic
+from pruning import prune_problem
+from symmetry import Symmetry
 from my_planning_graph import PlanningGraph
 
-from functools import lru_cache
-
 
 class AirCargoProblem(Problem):
-    def __init__(self, cargos, planes, airports, initial: FluentState, goal: list):
+    def __init__(self, cargos, planes, airports, initial: FluentState, goal: list, debug=False, prune=True,
+                 symmetry=True):
         """
 
         :param cargos: list of str
@@ -26,14 +30,33 @@ class AirCargoProblem(Problem):
             positive and negative literal fluents (as expr) describing initial state
         :param goal: list of expr
             literal fluents required for goal test
+        :param debug: bool
+            whether `result` lists every applicable action when given an action that is not applicable
+        :param prune: bool
+            whether to drop the ground actions that are unreachable from the initial state or irrelevant
+            to the goal, and the fluents no remaining action or goal reads (see `pruning`)
+        :param symmetry: bool
+            whether the graph searches treat states that are the same up to interchangeable cargos, planes
+            or airports as duplicates (see `symmetry`)
         """
-        self.state_map = initial.pos + initial.neg
-        self.initial_state_TF = encode_state(initial, self.state_map)
-        Problem.__init__(self, self.initial_state_TF, goal=goal)
         self.cargos = cargos
         self.planes = planes
         self.airports = airports
         self.actions_list = self.get_actions()
+        self.pruning_stats = None
+        if prune:
+            initial, self.actions_list, self.pruning_stats = prune_problem(initial, goal, self.actions_list)
+        self.state_map = initial.pos + initial.neg
+        self.fluent_bits = fluent_bits(self.state_map)
+        self.initial_state_TF = encode_state(initial, self.state_map)
+        self.debug = debug
+        Problem.__init__(self, encode_packed_state(initial, self.state_map), goal=goal)
+        self.successors = SuccessorGenerator(self.actions_list, self.fluent_bits)
+        self.goal_mask = GoalMask(goal, self.fluent_bits)
+        self.goal_cover = GoalCover(self.goal_mask, self.successors)
+        self.symmetry = Symmetry(self, [cargos, planes, airports]) if symmetry else None
+        if self.symmetry is not None and not self.symmetry.classes:
+            self.symmetry = None
 
     def get_actions(self):
         """
@@ -115,70 +138,66 @@ class AirCargoProblem(Problem):
 
         return load_actions() + unload_actions() + fly_actions()
 
-    def actions(self, state: str) -> list:
-        def permissible(action, state):
-            for precond_pos in action.precond_pos:
-                if precond_pos not in decode_state(state, self.state_map).pos:
-                    return False
-            for precond_neg in action.precond_neg:
-                if precond_neg not in decode_state(state, self.state_map).neg:
-                    return False
-            return True
+    def actions(self, state: PackedState) -> list:
         """ Return the actions that can be executed in the given state.
 
-        :param state: str
-            state represented as T/F string of mapped fluents (state variables)
-            e.g. 'FTTTFF'
+        Only the actions filed under a fluent of the state in the precondition index of
+        the SuccessorGenerator are tested (see lp_utils.SuccessorGenerator).
+
+        :param state: PackedState
+            state represented as the bits of the mapped fluents (state variables), or
+            as the equivalent T/F string e.g. 'FTTTFF'
         :return: list of Action objects
         """
-        # TODO implement
-        possible_actions = [_ for _ in self.actions_list if permissible(_, state)]
-        return possible_actions
+        return self.successors.applicable(pack_state(state))
 
-    def result(self, state: str, action: Action):
+    def result(self, state: PackedState, action: Action) -> PackedState:
         """ Return the state that results from executing the given
         action in the given state. The action must be one of
-        self.actions(state).
+        self.actions(state), which is checked against its precondition masks.
 
         :param state: state entering node
         :param action: Action applied
         :return: resulting state after action
         """
-        available_action_strings = ['{}{!s}'.format(_.name, _.args) for _ in self.actions(state=state)]
-        action_string = '{}{!s}'.format(action.name, action.args)
-        decoded_state = decode_state(state=state, fluent_map=self.state_map)
-        new_state = decoded_state
-        if action_string in available_action_strings:
-            new_state = FluentState([_ for _ in decoded_state.pos if _ not in action.effect_rem] + action.effect_add,
-                                    [_ for _ in decoded_state.neg if _ not in action.effect_add] + action.effect_rem)
-        else:
-            raise Exception('wrong action: {}|{}, allowed_actions (in format <name|args|allowed.name==action.name'
+        state = pack_state(state)
+        pos, neg, add, rem = self.successors.masks(action)
+        if state & pos == pos and not state & neg:
+            # the length bit of the packed state is never in a mask
+            return PackedState(state & ~rem | add)
+        if not self.debug:
+            raise Exception('wrong action: {}|{} is not applicable in state {}'.format(action.name, action.args, state))
+        raise Exception('wrong action: {}|{}, allowed_actions (in format <name|args|allowed.name==action.name'
                             '|allowed.args==action.args|allowed==action>:\n{}'
                             .format(action.name, action.args,
                                     '\n'.join('<{}|{}|{}|{}|{}>'.format(_.name, _.args, _.name == action.name,
                                                                         _.args == action.args, _ == action)
                                               for _ in self.actions(state=state))))
-        return encode_state(new_state, self.state_map)
 
-    def goal_test(self, state: str) -> bool:
+    def canonical(self, state: PackedState) -> PackedState:
+        """ Return the representative of the states that are the same up to interchangeable objects.
+
+        :param state: PackedState
+        :return: PackedState
+        """
+        if self.symmetry is None:
+            return state
+        return self.symmetry.canonical(state)
+
+    def goal_test(self, state: PackedState) -> bool:
         """ Test the state to see if goal is reached
 
-        :param state: str representing state
+        :param state: PackedState (or T/F string) representing state
         :return: bool
         """
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+        return self.goal_mask.test(pack_state(state))
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
         h_const = 1
         return h_const
 
-    @lru_cache(maxsize=8192)
+    @cached_heuristic
     def h_pg_levelsum(self, node: Node):
         """This heuristic uses a planning graph representation of the problem
         state space to estimate the sum of all actions that must be carried
@@ -186,23 +205,73 @@ class AirCargoProblem(Problem):
         condition.
         """
         # requires implemented PlanningGraph class
-        pg = PlanningGraph(self, node.state)
+        pg = PlanningGraph(self, node.state, lazy=True)
         pg_levelsum = pg.h_levelsum()
         return pg_levelsum
 
-    @lru_cache(maxsize=8192)
+    @cached_heuristic
+    def h_pg_maxlevel(self, node: Node):
+        """This heuristic uses a planning graph representation of the problem
+        state space to estimate the number of levels needed before the last
+        of the goal conditions can be satisfied (admissible).
+        """
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_maxlevel()
+
+    @cached_heuristic
+    def h_pg_setlevel(self, node: Node):
+        """This heuristic uses a planning graph representation of the problem
+        state space to estimate the number of levels needed before all of the
+        goal conditions can be satisfied together, none of them being mutually
+        exclusive with another (admissible).
+        """
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_setlevel()
+
+    @cached_heuristic
+    def h_pg_add(self, node: Node):
+        """This heuristic sums the costs of reaching each goal condition when
+        the delete effects of the actions are ignored.
+        """
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_add()
+
+    @cached_heuristic
+    def h_pg_max(self, node: Node):
+        """This heuristic takes the largest cost of reaching a goal condition
+        when the delete effects of the actions are ignored (admissible).
+        """
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_max()
+
+    @cached_heuristic
+    def h_pg_ff(self, node: Node):
+        """This heuristic counts the actions of a relaxed plan extracted from
+        the planning graph, as in the FF planner.
+        """
+        pg = PlanningGraph(self, node.state, lazy=True)
+        return pg.h_ff()
+
+    @cached_heuristic
     def h_ignore_preconditions(self, node: Node):
         """This heuristic estimates the minimum number of actions that must be
         carried out from the current state in order to satisfy all of the goal
         conditions by ignoring the preconditions required for an action to be
-        executed.
+        executed.  The goal conditions the state misses are covered with the
+        fewest actions, exactly whatever the number of goals (see
+        lp_utils.GoalCover); h_ignore_preconditions_greedy is the greedy cover.
         """
-        negative_states = decode_state(node.state, self.state_map).neg
-        negative_state_strings = {'{}{!s}'.format(_.op, _.args) for _ in negative_states}
-        goal_state_strings = {'{}{!s}'.format(_.op, _.args) for _ in self.goal}
-        count = len(negative_state_strings.intersection(goal_state_strings))
+        count = self.goal_cover(pack_state(node.state))
         return count
 
+    @cached_heuristic
+    def h_ignore_preconditions_greedy(self, node: Node):
+        """This heuristic approximates h_ignore_preconditions with a greedy
+        set cover of the goal conditions by the effects of the actions; it
+        is cheaper for large goal sets but not admissible.
+        """
+        return self.goal_cover.greedy(pack_state(node.state))
+
 
 def air_cargo_p1() -> AirCargoProblem:
     cargos = ['C1', 'C2']
@@ -316,3 +385,40 @@ def air_cargo_p3() -> AirCargoProblem:
             expr('At(C3, JFK)'),
             ]
     return AirCargoProblem(cargos, planes, airports, init, goal)
+
+
+def air_cargo_generated(n_cargos: int, n_planes: int, n_airports: int, seed=None) -> AirCargoProblem:
+    """ an air cargo problem with n_cargos cargos, n_planes planes and n_airports airports
+
+    Without a seed the instance is structured: cargo i and plane i start at airport i (modulo
+    n_airports) and cargo i must reach the next airport.  With a seed every cargo and plane
+    starts at a random airport and every cargo must reach a random other airport, the same
+    seed always giving the same problem.
+
+    :param n_cargos: int, at least 1
+    :param n_planes: int, at least 1
+    :param n_airports: int, at least 2
+    :param seed: None or int, seed of the random initial state and goal
+    :return: AirCargoProblem
+    """
+    if n_cargos < 1 or n_planes < 1 or n_airports < 2:
+        raise ValueError('an air cargo problem needs a cargo, a plane and two airports')
+    cargos = ['C{}'.format(i + 1) for i in range(n_cargos)]
+    planes = ['P{}'.format(i + 1) for i in range(n_planes)]
+    airports = ['A{}'.format(i + 1) for i in range(n_airports)]
+    if seed is None:
+        start = {thing: airports[i % n_airports] for things in (cargos, planes) for i, thing in enumerate(things)}
+        target = {cargo: airports[(i + 1) % n_airports] for i, cargo in enumerate(cargos)}
+    else:
+        rng = random.Random(seed)
+        start = {thing: rng.choice(airports) for thing in cargos + planes}
+        target = {cargo: rng.choice([a for a in airports if a != start[cargo]]) for cargo in cargos}
+    pos = [expr('At({}, {})'.format(thing, start[thing])) for thing in cargos + planes]
+    neg = [expr('At({}, {})'.format(cargo, airport))
+           for cargo in cargos for airport in airports if airport != start[cargo]]
+    neg += [expr('In({}, {})'.format(cargo, plane)) for cargo in cargos for plane in planes]
+    neg += [expr('At({}, {})'.format(plane, airport))
+            for plane in planes for airport in airports if airport != start[plane]]
+    init = FluentState(pos, neg)
+    goal = [expr('At({}, {})'.format(cargo, target[cargo])) for cargo in cargos]
+    return AirCargoProblem(cargos, planes, airports, init, goal)
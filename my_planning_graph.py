@@ -1,6 +1,9 @@
+from collections import defaultdict
+
 from aimacode.planning import Action
 from aimacode.search import Problem
-from aimacode.utils import expr
+from aimacode.utils import Expr
+from bitset_planning_graph import bits, compile_problem
 from lp_utils import decode_state
 
 
@@ -11,7 +14,12 @@ class PgNode():
     parents: the set of nodes in the previous level
     children: the set of nodes in the subsequent level
     mutex: the set of sibling nodes that are mutually exclusive with this node
+
+    The node classes use __slots__.  A PlanningGraph does not store nodes: it keeps the
+    ids of the literals and actions of each level and their mutexes as bitsets, and only
+    creates nodes (PgNodeView_s, PgNodeView_a) when they are asked for.
     """
+    __slots__ = ('parents', 'children', 'mutex')
 
     def __init__(self):
         self.parents = set()
@@ -55,12 +63,15 @@ class PgNode_s(PgNode):
         Boolean flag indicating whether the literal expression is positive or
         negative.
     """
+    __slots__ = ('symbol', 'is_pos', 'literal_id', '__hash')
 
-    def __init__(self, symbol: str, is_pos: bool):
+    def __init__(self, symbol: str, is_pos: bool, literal_id=None):
         """S-level Planning Graph node constructor
 
         :param symbol: expr
         :param is_pos: bool
+        :param literal_id: int
+            index of the literal in PlanningGraphTemplate.literals, if the node belongs to a graph
         Instance variables calculated:
             literal: expr
                     fluent in its literal form including negative operator if applicable
@@ -72,6 +83,7 @@ class PgNode_s(PgNode):
         PgNode.__init__(self)
         self.symbol = symbol
         self.is_pos = is_pos
+        self.literal_id = literal_id
         self.__hash = None
 
     def show(self):
@@ -107,13 +119,20 @@ class PgNode_s(PgNode):
 
 class PgNode_a(PgNode):
     """A-type (action) Planning Graph node - inherited from PgNode """
+    __slots__ = ('action', 'action_id', 'prenodes', 'effnodes', 'is_persistent', '__hash')
 
-
-    def __init__(self, action: Action):
+    def __init__(self, action: Action, prenodes=None, effnodes=None, action_id=None):
         """A-level Planning Graph node constructor
 
         :param action: Action
             a ground action, i.e. this action cannot contain any variables
+        :param prenodes: set of PgNode_s
+            precomputed precondition nodes of the action (see PlanningGraphTemplate); derived from
+            the action when not given
+        :param effnodes: set of PgNode_s
+            precomputed effect nodes of the action; derived from the action when not given
+        :param action_id: int
+            index of the action in PlanningGraphTemplate.all_actions, if the node comes from a template
         Instance variables calculated:
             An A-level will always have an S-level as its parent and an S-level as its child.
             The preconditions and effects will become the parents and children of the A-level node
@@ -128,8 +147,9 @@ class PgNode_a(PgNode):
         """
         PgNode.__init__(self)
         self.action = action
-        self.prenodes = self.precond_s_nodes()
-        self.effnodes = self.effect_s_nodes()
+        self.action_id = action_id
+        self.prenodes = self.precond_s_nodes() if prenodes is None else prenodes
+        self.effnodes = self.effect_s_nodes() if effnodes is None else effnodes
         self.is_persistent = self.prenodes == self.effnodes
         self.__hash = None
 
@@ -189,6 +209,110 @@ class PgNode_a(PgNode):
         return self.__hash
 
 
+class PgNodeView_s(PgNode_s):
+    """An S-node of a PlanningGraph level, created on demand
+
+    The graph only keeps the literal ids of each level and the mutexes as bitsets indexed
+    by literal id, so the parents, children and mutex sets are read from those arrays.
+    The parents do not change once the level is built, so they are only read once.
+    """
+    __slots__ = ('graph', 'level', '_parents')
+
+    def __init__(self, graph: 'PlanningGraph', level: int, literal_id: int):
+        """
+        :param graph: PlanningGraph
+        :param level: int, the S-level of the node
+        :param literal_id: int
+        """
+        literal = graph.template.literals[literal_id]
+        self.symbol = literal.symbol
+        self.is_pos = literal.is_pos
+        self.literal_id = literal_id
+        self._PgNode_s__hash = None
+        self.graph = graph
+        self.level = level
+        self._parents = None
+
+    @property
+    def parents(self) -> set:
+        if self._parents is None:
+            graph = self.graph
+            if self.level == 0:
+                self._parents = frozenset()
+            else:
+                producers = graph.template.producer_mask[self.literal_id] & graph.a_masks[self.level - 1]
+                self._parents = frozenset(graph.a_node(self.level - 1, action_id) for action_id in bits(producers))
+        return self._parents
+
+    @property
+    def children(self) -> set:
+        graph = self.graph
+        if self.level >= len(graph.a_masks):
+            return set()
+        consumers = graph.template.consumer_mask[self.literal_id] & graph.a_masks[self.level]
+        return {graph.a_node(self.level, action_id) for action_id in bits(consumers)}
+
+    @property
+    def mutex(self) -> set:
+        row = self.graph.s_mutex[self.level]
+        if row is None:
+            return set()
+        return {self.graph.s_node(self.level, literal_id) for literal_id in bits(row[self.literal_id])}
+
+    def is_mutex(self, other) -> bool:
+        row = self.graph.s_mutex[self.level]
+        return row is not None and bool(row[self.literal_id] >> other.literal_id & 1)
+
+
+class PgNodeView_a(PgNode_a):
+    """An A-node of a PlanningGraph level, created on demand (see PgNodeView_s)"""
+    __slots__ = ('graph', 'level', '_children')
+
+    def __init__(self, graph: 'PlanningGraph', level: int, action_id: int):
+        """
+        :param graph: PlanningGraph
+        :param level: int, the A-level of the node
+        :param action_id: int
+        """
+        template = graph.template
+        self.action = template.all_actions[action_id]
+        self.action_id = action_id
+        self.prenodes = template.prenodes[action_id]
+        self.effnodes = template.effnodes[action_id]
+        self.is_persistent = template.is_persistent[action_id]
+        self._PgNode_a__hash = None
+        self.graph = graph
+        self.level = level
+        self._children = None
+
+    @property
+    def parents(self) -> set:
+        graph = self.graph
+        return {graph.s_node(self.level, literal_id) for literal_id in graph.template.pre_ids[self.action_id]}
+
+    @property
+    def children(self) -> set:
+        if self._children is None:
+            graph = self.graph
+            if self.level + 1 >= len(graph.s_masks):
+                # the next S-level is not built yet
+                return frozenset()
+            self._children = frozenset(graph.s_node(self.level + 1, literal_id)
+                                       for literal_id in graph.template.eff_ids[self.action_id])
+        return self._children
+
+    @property
+    def mutex(self) -> set:
+        row = self.graph.a_mutex[self.level]
+        if row is None:
+            return set()
+        return {self.graph.a_node(self.level, action_id) for action_id in bits(row[self.action_id])}
+
+    def is_mutex(self, other) -> bool:
+        row = self.graph.a_mutex[self.level]
+        return row is not None and bool(row[self.action_id] >> other.action_id & 1)
+
+
 def mutexify(node1: PgNode, node2: PgNode):
     """ adds sibling nodes to each other's mutual exclusion (mutex) set. These should be sibling nodes!
 
@@ -203,60 +327,238 @@ def mutexify(node1: PgNode, node2: PgNode):
     node2.mutex.add(node1)
 
 
+def noop_actions(literal_list):
+    """create persistent action for each possible fluent
+
+    "No-Op" actions are virtual actions (i.e., actions that only exist in
+    the planning graph, not in the planning problem domain) that operate
+    on each fluent (literal expression) from the problem domain. No op
+    actions "pass through" the literal expressions from one level of the
+    planning graph to the next.
+
+    The no-op action list requires both a positive and a negative action
+    for each literal expression. Positive no-op actions require the literal
+    as a positive precondition and add the literal expression as an effect
+    in the output, and negative no-op actions require the literal as a
+    negative precondition and remove the literal expression as an effect in
+    the output.
+
+    :param literal_list: list of expr
+    :return: list of Action
+    """
+    action_list = []
+    for fluent in literal_list:
+        act1 = Action(Expr('Noop_pos', fluent), ([fluent], []), ([fluent], []))
+        action_list.append(act1)
+        act2 = Action(Expr('Noop_neg', fluent), ([], [fluent]), ([], [fluent]))
+        action_list.append(act2)
+    return action_list
+
+
+class PlanningGraphTemplate():
+    """State-independent part of the planning graphs of a problem
+
+    The literals and actions are numbered as in the CompiledProblem of the problem (see
+    `bitset_planning_graph.compile_problem`), whose precondition, effect and static mutex
+    masks are used as they are.  The template adds the ground and no-op actions, their
+    precondition and effect nodes and the other per-action data the node views and the
+    heuristics read, so they are created once (see `planning_graph_template`) and every
+    PlanningGraph only records which ids each of its levels holds.
+    """
+
+    def __init__(self, problem: Problem):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        Instance variables calculated:
+            compiled: CompiledProblem shared with the bitset and NumPy engines
+            literals: list of PgNode_s, one canonical (interned) node per literal, indexed by literal id
+            literal_ids: dict of (symbol, is_pos) -> literal id
+            negation: list of int, the literal id of the negation of each literal
+            all_actions: list of the PlanningProblem ground actions followed by the no-op actions
+            prenodes: list of frozenset of PgNode_s, the (interned) precondition nodes of each action
+            effnodes: list of frozenset of PgNode_s, the (interned) effect nodes of each action
+            preconds: list of tuple of (symbol, is_pos), the precondition literals of each action
+            pre_ids: list of tuple of int, the precondition literal ids of each action
+            eff_ids: list of tuple of int, the effect literal ids of each action
+            is_persistent: list of bool, whether each action is a persistence action
+        The masks are those of `compiled`:
+            pre_mask: list of int, the bitset of the precondition literal ids of each action
+            eff_mask: list of int, the bitset of the effect literal ids of each action
+            persistent_mask: int, the bitset of the ids of the persistence actions
+            producer_mask: list of int, the bitset of producers of each literal id
+            consumer_mask: list of int, the bitset of consumers of each literal id
+            static_mutex: list of int, the bitset of the ids of the actions having inconsistent effects
+                or interference with each action
+        """
+        compiled = self.compiled = compile_problem(problem)
+        self.pre_mask = compiled.pre
+        self.eff_mask = compiled.eff
+        self.persistent_mask = compiled.persistent
+        self.producer_mask = compiled.adders
+        self.consumer_mask = compiled.needers
+        self.static_mutex = compiled.static_mutex
+
+        self.literals = []
+        self.literal_ids = {}
+        for literal_id in range(compiled.num_literals):
+            symbol, is_pos = compiled.literal(literal_id)
+            self.literal_ids[(symbol, is_pos)] = literal_id
+            self.literals.append(PgNode_s(symbol, is_pos, literal_id))
+        self.negation = [compiled.negate(literal_id) for literal_id in range(compiled.num_literals)]
+
+        self.all_actions = [compiled.action(action_id) for action_id in range(compiled.num_actions)]
+        self.pre_ids = [tuple(bits(mask)) for mask in self.pre_mask]
+        self.eff_ids = [tuple(bits(mask)) for mask in self.eff_mask]
+        self.prenodes = [frozenset(self.literals[literal_id] for literal_id in ids) for ids in self.pre_ids]
+        self.effnodes = [frozenset(self.literals[literal_id] for literal_id in ids) for ids in self.eff_ids]
+        self.preconds = [tuple((node.symbol, node.is_pos) for node in nodes) for nodes in self.prenodes]
+        self.is_persistent = [bool(self.persistent_mask >> action_id & 1)
+                              for action_id in range(compiled.num_actions)]
+
+    def literal(self, symbol, is_pos: bool) -> PgNode_s:
+        """the canonical node of a literal; it is shared and must not be connected to a graph
+
+        :param symbol: expr
+        :param is_pos: bool
+        :return: PgNode_s
+        """
+        return self.literals[self.literal_ids[(symbol, is_pos)]]
+
+
+def planning_graph_template(problem: Problem) -> PlanningGraphTemplate:
+    """return the PlanningGraphTemplate of a problem, compiling it on first use
+
+    The template is cached on the problem object itself.
+
+    :param problem: PlanningProblem
+    :return: PlanningGraphTemplate
+    """
+    template = getattr(problem, '_pg_template', None)
+    if template is None:
+        template = PlanningGraphTemplate(problem)
+        problem._pg_template = template
+    return template
+
+
 class PlanningGraph():
     """
     A planning graph as described in chapter 10 of the AIMA text. The planning
     graph can be used to reason about 
     """
 
-    def __init__(self, problem: Problem, state: str, serial_planning=True):
+    def __init__(self, problem: Problem, state, serial_planning=True, incremental_mutex=False,
+                 lazy=False):
         """
         :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
-        :param state: str (will be in form TFTTFF... representing fluent states)
+        :param state: PackedState (or str in form TFTTFF... representing fluent states)
         :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+        :param incremental_mutex: bool (whether the mutexes of a level are derived from those of the
+            preceding level instead of being computed from scratch)
+        :param lazy: bool (whether to only build S0 and let the heuristics grow the graph on demand
+            with `expand`, instead of building it until it levels off)
         Instance variable calculated:
             fs: FluentState
                 the state represented as positive and negative fluent literal lists
+            template: PlanningGraphTemplate shared by all planning graphs of the problem
             all_actions: list of the PlanningProblem valid ground actions combined with calculated no-op actions
-            s_levels: list of sets of PgNode_s, where each set in the list represents an S-level in the planning graph
-            a_levels: list of sets of PgNode_a, where each set in the list represents an A-level in the planning graph
+            s_masks: list of int, the bitset of the literal ids of each S-level
+            a_masks: list of int, the bitset of the action ids of each A-level
+            s_mutex: list, per S-level a list indexed by literal id of the bitset of its mutex literals,
+                or None while the mutexes of the level are not computed
+            a_mutex: list, per A-level a list indexed by action id of the bitset of its mutex actions,
+                or None while the mutexes of the level are not computed
+            action_ids: list of lists, the ids of the actions of each A-level
+            literal_level: dict of (symbol, is_pos) -> the first S-level containing the literal
+            mutex_levels: int, number of S-levels whose mutexes (and those of the A-level before) are computed
+            leveled: bool, True once the graph has leveled off
         """
         self.problem = problem
         self.fs = decode_state(state, problem.state_map)
         self.serial = serial_planning
-        self.all_actions = self.problem.actions_list + self.noop_actions(self.problem.state_map)
-        self.s_levels = []
-        self.a_levels = []
+        self.incremental_mutex = incremental_mutex
+        self.lazy = lazy
+        self.literal_level = {}
+        self.mutex_levels = 0
+        self.leveled = False
+        self.template = planning_graph_template(problem)
+        self.all_actions = self.template.all_actions
+        self.s_masks = []
+        self.a_masks = []
+        self.s_mutex = []
+        self.a_mutex = []
+        self.action_ids = []
+        self._s_views = {}
+        self._a_views = {}
         self.create_graph()
 
-    def noop_actions(self, literal_list):
-        """create persistent action for each possible fluent
+    @property
+    def s_levels(self) -> list:
+        """the S-levels as sets of PgNode_s (views over the bitsets of the graph)"""
+        return [{self.s_node(level, literal_id) for literal_id in bits(mask)}
+                for level, mask in enumerate(self.s_masks)]
+
+    @property
+    def a_levels(self) -> list:
+        """the A-levels as sets of PgNode_a (views over the bitsets of the graph)"""
+        return [{self.a_node(level, action_id) for action_id in bits(mask)}
+                for level, mask in enumerate(self.a_masks)]
+
+    @property
+    def s_nodes(self) -> list:
+        """the PgNode_s of each S-level indexed by literal id (None if absent)"""
+        nodes = []
+        for level, mask in enumerate(self.s_masks):
+            level_nodes = [None] * len(self.template.literals)
+            for literal_id in bits(mask):
+                level_nodes[literal_id] = self.s_node(level, literal_id)
+            nodes.append(level_nodes)
+        return nodes
+
+    @property
+    def a_nodes(self) -> list:
+        """the PgNode_a of each A-level indexed by action id (None if absent)"""
+        nodes = []
+        for level, mask in enumerate(self.a_masks):
+            level_nodes = [None] * len(self.template.all_actions)
+            for action_id in bits(mask):
+                level_nodes[action_id] = self.a_node(level, action_id)
+            nodes.append(level_nodes)
+        return nodes
 
-        "No-Op" actions are virtual actions (i.e., actions that only exist in
-        the planning graph, not in the planning problem domain) that operate
-        on each fluent (literal expression) from the problem domain. No op
-        actions "pass through" the literal expressions from one level of the
-        planning graph to the next.
+    def s_node(self, level: int, literal_id: int) -> PgNode_s:
+        """ the node of a literal of an S-level, the same object on every call
 
-        The no-op action list requires both a positive and a negative action
-        for each literal expression. Positive no-op actions require the literal
-        as a positive precondition and add the literal expression as an effect
-        in the output, and negative no-op actions require the literal as a
-        negative precondition and remove the literal expression as an effect in
-        the output.
+        :param level: int
+        :param literal_id: int, a literal of the level
+        :return: PgNodeView_s
+        """
+        node = self._s_views.get((level, literal_id))
+        if node is None:
+            node = self._s_views[(level, literal_id)] = PgNodeView_s(self, level, literal_id)
+        return node
 
-        This function should only be called by the class constructor.
+    def a_node(self, level: int, action_id: int) -> PgNode_a:
+        """ the node of an action of an A-level, the same object on every call
+
+        :param level: int
+        :param action_id: int, an action of the level
+        :return: PgNodeView_a
+        """
+        node = self._a_views.get((level, action_id))
+        if node is None:
+            node = self._a_views[(level, action_id)] = PgNodeView_a(self, level, action_id)
+        return node
+
+    def noop_actions(self, literal_list):
+        """create persistent action for each possible fluent (see the module function noop_actions)
+
+        The no-op actions of the problem are created once by its PlanningGraphTemplate, so
+        this is not called by the class constructor anymore.
 
         :param literal_list:
         :return: list of Action
         """
-        action_list = []
-        for fluent in literal_list:
-            act1 = Action(expr("Noop_pos({})".format(fluent)), ([fluent], []), ([fluent], []))
-            action_list.append(act1)
-            act2 = Action(expr("Noop_neg({})".format(fluent)), ([], [fluent]), ([], [fluent]))
-            action_list.append(act2)
-        return action_list
+        return noop_actions(literal_list)
 
     def create_graph(self):
         """ build a Planning Graph as described in Russell-Norvig 3rd Ed 10.3 or 2nd Ed 11.4
@@ -269,71 +571,149 @@ class PlanningGraph():
         This function should only be called by the class constructor.
 
         :return:
-            builds the graph by filling s_levels[] and a_levels[] lists with node sets for each level
+            builds the graph by filling s_masks[] and a_masks[] lists with the literals and actions of each level
         """
         # the graph should only be built during class construction
-        if (len(self.s_levels) != 0) or (len(self.a_levels) != 0):
+        if (len(self.s_masks) != 0) or (len(self.a_masks) != 0):
             raise Exception(
                 'Planning Graph already created; construct a new planning graph for each new state in the planning sequence')
 
         # initialize S0 to literals in initial state provided.
-        leveled = False
-        level = 0
-        self.s_levels.append(set())  # S0 set of s_nodes - empty to start
-        # for each fluent in the initial state, add the correct literal PgNode_s
-        for literal in self.fs.pos:
-            self.s_levels[level].add(PgNode_s(literal, True))
-        for literal in self.fs.neg:
-            self.s_levels[level].add(PgNode_s(literal, False))
+        literal_ids = self.template.literal_ids
+        s0 = 0
+        for literal in [(fluent, True) for fluent in self.fs.pos] + [(fluent, False) for fluent in self.fs.neg]:
+            s0 |= 1 << literal_ids[literal]
+            self.literal_level[literal] = 0
+        self.s_masks.append(s0)
         # no mutexes at the first level
+        self.s_mutex.append([0] * len(self.template.literals))
+        self.mutex_levels = 1
 
-        # continue to build the graph alternating A, S levels until last two S levels contain the same literals,
-        # i.e. until it is "leveled"
-        while not leveled:
-            self.add_action_level(level)
-            self.update_a_mutex(self.a_levels[level])
+        # continue to build the graph alternating A, S levels until last two S levels contain the same literals
+        # and the same mutex pairs, i.e. until it is "leveled"
+        if not self.lazy:
+            self.expand()
 
-            level += 1
-            self.add_literal_level(level)
-            self.update_s_mutex(self.s_levels[level])
+    def expand(self, goals=None, mutex=True) -> bool:
+        """ grow the graph until every goal literal appears in it or it levels off
 
-            if self.s_levels[level] == self.s_levels[level - 1]:
-                leveled = True
+        Lazy graphs start from S0 only, so a heuristic asks for exactly the levels it
+        needs: as soon as every goal is present the expansion stops, and a graph that
+        levels off without some goal proves that goal unreachable.  The mutexes of the
+        new levels are only computed when asked for; if a later call needs them, they
+        are first computed for the levels built without them.
 
-    def add_action_level(self, level):
-        """ add an A (action) level to the Planning Graph
+        :param goals: iterable of (symbol, is_pos) literals or None to expand until the graph levels off
+        :param mutex: bool (whether the heuristic uses the mutex relations)
+        :return: bool
+            True if every goal literal is in the graph
+        """
+        if mutex and self.mutex_levels < len(self.s_masks):
+            for level in range(self.mutex_levels, len(self.s_masks)):
+                self.update_a_mutex(level - 1)
+                self.update_s_mutex(level)
+            self.mutex_levels = len(self.s_masks)
+            self.leveled = self.is_leveled()
+
+        goals = None if goals is None else list(goals)
+        while not self.leveled:
+            if goals is not None and all(goal in self.literal_level for goal in goals):
+                break
+            self.add_level(mutex)
+        return goals is None or all(goal in self.literal_level for goal in goals)
+
+    def add_level(self, mutex=True):
+        """ add the next A-level and S-level to the graph
+
+        :param mutex: bool (whether to compute the mutexes of the new levels)
+        :return:
+            appends to a_masks and s_masks and updates leveled
+        """
+        level = len(self.a_masks)
+        self.add_action_level(level)
+        if mutex:
+            self.update_a_mutex(level)
+
+        level += 1
+        self.add_literal_level(level)
+        if mutex:
+            self.update_s_mutex(level)
+            self.mutex_levels = level + 1
+        self.leveled = self.is_leveled()
+
+    def is_leveled(self) -> bool:
+        """ test whether the last two S-levels have the same literals, and the same mutex
+        pairs if those have been computed
 
+        :return: bool
+        """
+        if len(self.s_masks) < 2 or self.s_masks[-1] != self.s_masks[-2]:
+            return False
+        if self.mutex_levels < len(self.s_masks):
+            return True
+        return self.s_mutex[-1] == self.s_mutex[-2]
+
+    def previous_mutex(self, mutex: list, level: int):
+        """ the mutexes of the preceding level, which seed those of a level in incremental mode
+
+        Mutex relations only disappear as the graph grows, so the mutex pairs of a level
+        between nodes that already existed one level earlier are a subset of the pairs of
+        that level.  S0 carries no mutexes at all, so the two first levels of each kind
+        are always computed from scratch.
+
+        :param mutex: list, self.a_mutex or self.s_mutex
         :param level: int
-            the level number alternates S0, A0, S1, A1, S2, .... etc the level number is also used as the
-            index for the node set lists self.a_levels[] and self.s_levels[]
-        :return:
-            adds A nodes to the current level in self.a_levels[level]
+        :return: list of int or None if the level must be computed from scratch
         """
+        if not self.incremental_mutex or level < 2:
+            return None
+        return mutex[level - 1]
 
-        pos_literal_expr = [_.symbol for _ in self.s_levels[-1] if _.is_pos]
-        neg_literal_expr = [_.symbol for _ in self.s_levels[-1] if not _.is_pos]
+    def literal_node(self, level: int, literal) -> PgNode_s:
+        """ the node of a literal in an S-level
 
-        pga_set = set()
-        for action in self.all_actions:
-            if all([_ in pos_literal_expr for _ in action.precond_pos]) and all([_ in neg_literal_expr for _ in action.precond_neg]):
-                pga_set.add(PgNode_a(action))
+        :param level: int
+        :param literal: tuple of (symbol, is_pos)
+        :return: PgNode_s or None if the literal is not in the level
+        """
+        literal_id = self.template.literal_ids.get(literal)
+        if literal_id is None or not self.s_masks[level] >> literal_id & 1:
+            return None
+        return self.s_node(level, literal_id)
 
-        for pga_node in pga_set:
-            parent_nodes = set()
-            for prenode in pga_node.prenodes:
-                for connectable_node in self.s_levels[-1]:
-                    if connectable_node == prenode:
-                        parent_nodes.add(connectable_node)
-                        connectable_node.children.add(pga_node)
-                        break
-                else:
-                    raise
-                pga_node.parents = parent_nodes
+    @staticmethod
+    def mutex_pairs(nodeset: set) -> set:
+        """ the mutex pairs of a level of S-nodes, comparable between levels
+
+        :param nodeset: set of PgNode_s
+        :return: set of frozenset of (symbol, is_pos) pairs
+        """
+        return {frozenset([(node.symbol, node.is_pos), (other.symbol, other.is_pos)])
+                for node in nodeset for other in node.mutex}
 
-        self.a_levels.append(pga_set)
+    def add_action_level(self, level):
+        """ add an A (action) level to the Planning Graph
+
+        :param level: int
+            the level number alternates S0, A0, S1, A1, S2, .... etc the level number is also used as the
+            index for the lists self.a_masks[] and self.s_masks[]
+        :return:
+            adds the actions of the level to self.a_masks[level] and self.action_ids[level]
+        """
 
+        pre_mask = self.template.pre_mask
+        s_mask = self.s_masks[level]
 
+        a_mask = 0
+        action_ids = []
+        for action_id in range(len(pre_mask)):
+            if pre_mask[action_id] & s_mask == pre_mask[action_id]:
+                a_mask |= 1 << action_id
+                action_ids.append(action_id)
 
+        self.a_masks.append(a_mask)
+        self.action_ids.append(action_ids)
+        self.a_mutex.append(None)
 
         # TODO add action A level to the planning graph as described in the Russell-Norvig text
         # 1. determine what actions to add and create those PgNode_a objects
@@ -348,21 +728,21 @@ class PlanningGraph():
 
         :param level: int
             the level number alternates S0, A0, S1, A1, S2, .... etc the level number is also used as the
-            index for the node set lists self.a_levels[] and self.s_levels[]
+            index for the lists self.a_masks[] and self.s_masks[]
         :return:
-            adds S nodes to the current level in self.s_levels[level]
-        """
-        s_levels = set()
-        preceding_actions = self.a_levels[level-1]
-        for preceding_action in preceding_actions:
-            for effect_node in preceding_action.effnodes:
-                if effect_node not in s_levels:
-                    s_levels.add(effect_node)
-                    preceding_action.children.add(effect_node)
-                    effect_node.parents.add(preceding_action)
-                else:
-                    pass
-        self.s_levels.append(s_levels)
+            adds the literals of the level to self.s_masks[level]
+        """
+        template = self.template
+        eff_mask = template.eff_mask
+        s_mask = 0
+        for action_id in self.action_ids[level - 1]:
+            s_mask |= eff_mask[action_id]
+        # the no-op actions carry every literal over, so the new ones are those missing from the preceding level
+        for literal_id in bits(s_mask & ~self.s_masks[level - 1]):
+            literal = template.literals[literal_id]
+            self.literal_level[(literal.symbol, literal.is_pos)] = level
+        self.s_masks.append(s_mask)
+        self.s_mutex.append(None)
         # TODO add literal S level to the planning graph as described in the Russell-Norvig text
         # 1. determine what literals to add
         # 2. connect the nodes
@@ -372,7 +752,7 @@ class PlanningGraph():
         #   all of the new S nodes as children of all the A nodes that could produce them, and likewise add the A nodes to the
         #   parent sets of the S nodes
 
-    def update_a_mutex(self, nodeset):
+    def update_a_mutex(self, level: int):
         """ Determine and update sibling mutual exclusion for A-level nodes
 
         Mutex action tests section from 3rd Ed. 10.3 or 2nd Ed. 11.4
@@ -383,18 +763,53 @@ class PlanningGraph():
            Interference
            Competing needs
 
-        :param nodeset: set of PgNode_a (siblings in the same level)
+        Instead of testing every sibling pair, the candidate pairs are read off the inverted
+        indexes of the PlanningGraphTemplate (literal -> actions having it as effect,
+        literal -> actions having it as precondition) and its precomputed inconsistent
+        effects and interference pairs, so only pairs that actually share a negated literal
+        or a pair of mutex preconditions are visited.
+
+        In incremental mode, competing needs (the only condition that depends on the level)
+        is only rechecked, for the actions the preceding A-level already contained, against
+        the actions they were mutex with in that level.
+
+        :param level: int, the A-level, whose preceding S-level has its mutexes computed
         :return:
-            mutex set in each PgNode_a in the set is appropriately updated
+            sets self.a_mutex[level]
         """
-        nodelist = list(nodeset)
-        for i, n1 in enumerate(nodelist[:-1]):
-            for n2 in nodelist[i + 1:]:
-                if (self.serialize_actions(n1, n2) or
-                        self.inconsistent_effects_mutex(n1, n2) or
-                        self.interference_mutex(n1, n2) or
-                        self.competing_needs_mutex(n1, n2)):
-                    mutexify(n1, n2)
+        template = self.template
+        pre_mask = template.pre_mask
+        consumer_mask = template.consumer_mask
+        a_mask = self.a_masks[level]
+        s_mutex = self.s_mutex[level]
+        serial = a_mask & ~template.persistent_mask if self.serial else 0
+        previous = self.previous_mutex(self.a_mutex, level)
+        carried = self.a_masks[level - 1] if previous is not None else 0
+
+        rows = [0] * len(template.all_actions)
+        for action_id in self.action_ids[level]:
+            mutex = template.static_mutex[action_id]
+            if serial >> action_id & 1:
+                mutex |= serial
+            # Competing needs, from the mutex pairs of the preceding S-level
+            needs_mutex = 0
+            for literal_id in template.pre_ids[action_id]:
+                needs_mutex |= s_mutex[literal_id]
+            if needs_mutex:
+                if carried >> action_id & 1:
+                    for other in bits(previous[action_id] & ~mutex):
+                        if pre_mask[other] & needs_mutex:
+                            mutex |= 1 << other
+                else:
+                    for literal_id in bits(needs_mutex):
+                        mutex |= consumer_mask[literal_id]
+            rows[action_id] |= mutex & a_mask & ~(1 << action_id)
+            # every condition is symmetric, but the actions carried over from the preceding level
+            # only look for their new partners among the actions they were already mutex with
+            if previous is not None and not carried >> action_id & 1:
+                for other in bits(rows[action_id] & carried):
+                    rows[other] |= 1 << action_id
+        self.a_mutex[level] = rows
 
     def serialize_actions(self, node_a1: PgNode_a, node_a2: PgNode_a) -> bool:
         """
@@ -450,8 +865,8 @@ class PlanningGraph():
         :return: bool
         """
         # TODO test for Interference between nodes
-        return any([(_1.symbol == _2.symbol and _1.is_pos == _2.is_pos) for _1 in node_a1.prenodes for _2 in node_a2.effnodes]) or \
-               any([(_1.symbol == _2.symbol and _1.is_pos == _2.is_pos) for _1 in node_a1.effnodes for _2 in
+        return any([(_1.symbol == _2.symbol and _1.is_pos != _2.is_pos) for _1 in node_a1.prenodes for _2 in node_a2.effnodes]) or \
+               any([(_1.symbol == _2.symbol and _1.is_pos != _2.is_pos) for _1 in node_a1.effnodes for _2 in
                     node_a2.prenodes])
 
     def competing_needs_mutex(self, node_a1: PgNode_a, node_a2: PgNode_a) -> bool:
@@ -474,7 +889,7 @@ class PlanningGraph():
         # TODO test for Competing Needs between nodes
         return any([(_1.is_mutex(_2)) for _1 in node_a1.parents for _2 in node_a2.parents])
 
-    def update_s_mutex(self, nodeset: set):
+    def update_s_mutex(self, level: int):
         """ Determine and update sibling mutual exclusion for S-level nodes
 
         Mutex action tests section from 3rd Ed. 10.3 or 2nd Ed. 11.4
@@ -483,15 +898,53 @@ class PlanningGraph():
            Negation
            Inconsistent support
 
-        :param nodeset: set of PgNode_a (siblings in the same level)
+        The only candidates for inconsistent support with a literal are the literals
+        produced by actions that are mutex with every producer of that literal, so those are
+        collected from the mutex bitsets of the producers rather than testing every sibling pair.
+
+        In incremental mode, inconsistent support is only rechecked, for the literals the
+        preceding S-level already contained, against the literals they were mutex with in
+        that level.
+
+        :param level: int, the S-level, whose preceding A-level has its mutexes computed
         :return:
-            mutex set in each PgNode_a in the set is appropriately updated
+            sets self.s_mutex[level]
         """
-        nodelist = list(nodeset)
-        for i, n1 in enumerate(nodelist[:-1]):
-            for n2 in nodelist[i + 1:]:
-                if self.negation_mutex(n1, n2) or self.inconsistent_support_mutex(n1, n2):
-                    mutexify(n1, n2)
+        template = self.template
+        negation = template.negation
+        producer_mask = template.producer_mask
+        eff_mask = template.eff_mask
+        s_mask = self.s_masks[level]
+        a_mask = self.a_masks[level - 1]
+        a_mutex = self.a_mutex[level - 1]
+        previous = self.previous_mutex(self.s_mutex, level)
+        carried = self.s_masks[level - 1] if previous is not None else 0
+
+        rows = [0] * len(template.literals)
+        for literal_id in bits(s_mask):
+            # Negation
+            negated = negation[literal_id]
+            if s_mask >> negated & 1:
+                rows[literal_id] |= 1 << negated
+            # Inconsistent support
+            common = -1
+            for action_id in bits(producer_mask[literal_id] & a_mask):
+                common &= a_mutex[action_id]
+                if not common:
+                    break
+            if not common:
+                continue
+            if carried >> literal_id & 1:
+                candidates = previous[literal_id]
+            else:
+                candidates = 0
+                for action_id in bits(common):
+                    candidates |= eff_mask[action_id]
+            for other in bits(candidates & s_mask & ~(1 << literal_id)):
+                if producer_mask[other] & a_mask & ~common == 0:
+                    rows[literal_id] |= 1 << other
+                    rows[other] |= 1 << literal_id
+        self.s_mutex[level] = rows
 
     def negation_mutex(self, node_s1: PgNode_s, node_s2: PgNode_s) -> bool:
         """
@@ -533,11 +986,127 @@ class PlanningGraph():
 
         :return: int
         """
+        goals = [(goal, True) for goal in self.problem.goal]
+        self.expand(goals, mutex=False)
         level_sum = 0
-        for goal in self.problem.goal:
-            goal_node = PgNode_s(goal, True)
-            for level, s_level in enumerate(self.s_levels):
-                if goal_node in s_level:
-                    level_sum += level
-                    break
+        for goal in goals:
+            level_sum += self.literal_level.get(goal, 0)
         return level_sum
+
+    def h_maxlevel(self):
+        """The largest level cost of the individual goals (admissible)
+
+        :return: int, or infinity if a goal is unreachable
+        """
+        goals = [(goal, True) for goal in self.problem.goal]
+        if not self.expand(goals, mutex=False):
+            return float('inf')
+        return max([self.literal_level[goal] for goal in goals], default=0)
+
+    def h_setlevel(self):
+        """The first level where all the goals appear without any pair of them being
+        mutually exclusive (admissible, and at least as large as h_maxlevel)
+
+        :return: int, or infinity if the goals are never reachable together
+        """
+        goals = [(goal, True) for goal in self.problem.goal]
+        if not self.expand(goals, mutex=True):
+            return float('inf')
+        level = max([self.literal_level[goal] for goal in goals], default=0)
+        goal_ids = [self.template.literal_ids[goal] for goal in goals]
+        goal_mask = sum(1 << literal_id for literal_id in goal_ids)
+        while True:
+            s_mutex = self.s_mutex[level]
+            if not any(s_mutex[literal_id] & goal_mask for literal_id in goal_ids):
+                return level
+            if level == len(self.s_masks) - 1:
+                if self.leveled:
+                    return float('inf')
+                self.add_level(mutex=True)
+            level += 1
+
+    def relaxed_costs(self, combine) -> dict:
+        """Cost of reaching every literal in the delete-relaxed problem
+
+        The A-levels of the graph (built without mutexes, which the relaxation ignores)
+        are swept in order; the cost of an action is one plus the combination of the
+        costs of its preconditions, and the cost of a literal the cheapest action
+        producing it.  After the graph levels off its last A-level is swept again until
+        no cost decreases.
+
+        :param combine: function reducing a list of precondition costs, sum (h_add) or max (h_max)
+        :return: dict of (symbol, is_pos) -> cost
+        """
+        template = self.template
+        infinity = float('inf')
+        costs = [infinity] * len(template.literals)
+        for literal_id in bits(self.s_masks[0]):
+            costs[literal_id] = 0
+        level = 0
+        while True:
+            if level == len(self.a_masks) and not self.leveled:
+                self.add_level(mutex=False)
+            new_costs = list(costs)
+            for action_id in self.action_ids[min(level, len(self.a_masks) - 1)]:
+                if template.is_persistent[action_id]:
+                    continue
+                cost = 1 + combine([costs[literal_id] for literal_id in template.pre_ids[action_id]] or [0])
+                for literal_id in template.eff_ids[action_id]:
+                    if cost < new_costs[literal_id]:
+                        new_costs[literal_id] = cost
+            if new_costs == costs and level >= len(self.a_masks) - 1 and self.leveled:
+                break
+            costs = new_costs
+            level += 1
+        return {(literal.symbol, literal.is_pos): cost
+                for literal, cost in zip(template.literals, costs) if cost < infinity}
+
+    def h_add(self):
+        """The sum of the delete-relaxed costs of the goals (not admissible)
+
+        :return: int, or infinity if a goal is unreachable
+        """
+        costs = self.relaxed_costs(sum)
+        return sum(costs.get((goal, True), float('inf')) for goal in self.problem.goal)
+
+    def h_max(self):
+        """The largest delete-relaxed cost of the goals (admissible)
+
+        :return: int, or infinity if a goal is unreachable
+        """
+        costs = self.relaxed_costs(max)
+        return max([costs.get((goal, True), float('inf')) for goal in self.problem.goal], default=0)
+
+    def h_ff(self):
+        """The length of a relaxed plan extracted backward from the first levels of the goals (FF)
+
+        Every goal first appearing at level i is achieved by the action of A-level i-1
+        producing it whose preconditions appear earliest; those preconditions become
+        goals at their own first level.  Goals already achieved by an action selected
+        at the same level are skipped.  The mutexes are ignored.
+
+        :return: int, or infinity if a goal is unreachable
+        """
+        goals = [(goal, True) for goal in self.problem.goal]
+        if not self.expand(goals, mutex=False):
+            return float('inf')
+        template = self.template
+        goals_at = defaultdict(set)
+        for goal in goals:
+            goals_at[self.literal_level[goal]].add(goal)
+        top = max(goals_at, default=0)
+        relaxed_plan = 0
+        for level in range(top, 0, -1):
+            achieved = set()
+            for goal in goals_at[level]:
+                if goal in achieved:
+                    continue
+                producers = template.producer_mask[template.literal_ids[goal]] & \
+                    self.a_masks[level - 1] & ~template.persistent_mask
+                achiever = min(bits(producers), key=lambda action_id: sum(self.literal_level[literal]
+                                                                         for literal in template.preconds[action_id]))
+                relaxed_plan += 1
+                achieved.update((node.symbol, node.is_pos) for node in template.effnodes[achiever])
+                for literal in template.preconds[achiever]:
+                    goals_at[self.literal_level[literal]].add(literal)
+        return relaxed_plan
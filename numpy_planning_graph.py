@@ -0,0 +1,200 @@
+"""NumPy-vectorized planning graph engine (optional, requires numpy).
+
+Uses the literal and action ids of ``bitset_planning_graph.CompiledProblem``:
+the preconditions and effects of the actions become boolean incidence matrices
+of shape (actions, literals), the levels boolean vectors and the mutex relations
+boolean adjacency matrices, one per level.  Every mutex condition of a level is
+then computed for all pairs at once with matrix products instead of testing
+pairs one by one.  The graph has the same levels, mutexes and ``h_levelsum`` as
+``my_planning_graph.PlanningGraph``.
+"""
+from aimacode.search import Problem
+from bitset_planning_graph import compile_problem, bits
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, see BitsetPlanningGraph for a pure python engine
+    np = None
+
+
+class MatrixProblem():
+    """Incidence matrices of a planning problem, built once per problem (see `matrix_problem`)"""
+
+    def __init__(self, problem: Problem):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        Instance variables calculated:
+            compiled: CompiledProblem giving the literal and action ids
+            pre: bool array (actions, literals), the preconditions of each action
+            eff: bool array (actions, literals), the effects of each action
+            pre_f: float32 copy of pre for the matrix products (boolean products are not BLAS accelerated)
+            persistent: bool array (actions,), the persistence actions
+            negation: int array (literals,), the id of the negation of each literal
+            static_mutex: bool array (actions, actions), the inconsistent effects and interference pairs
+        """
+        if np is None:
+            raise ImportError('numpy is required for the matrix planning graph')
+        cp = compile_problem(problem)
+        self.compiled = cp
+        self.pre = np.zeros((cp.num_actions, cp.num_literals), dtype=bool)
+        self.eff = np.zeros((cp.num_actions, cp.num_literals), dtype=bool)
+        for a in range(cp.num_actions):
+            self.pre[a, list(bits(cp.pre[a]))] = True
+            self.eff[a, list(bits(cp.eff[a]))] = True
+        self.pre_f = self.pre.astype(np.float32)
+        self.persistent = np.array([bool(cp.persistent >> a & 1) for a in range(cp.num_actions)], dtype=bool)
+        self.negation = np.array([cp.negate(literal) for literal in range(cp.num_literals)], dtype=np.intp)
+
+        # column l of a negated matrix is column negation[l] of the original one
+        eff_negated = self.eff[:, self.negation]
+        pre_negated = self.pre[:, self.negation]
+        # inconsistent effects, then interference in both directions
+        self.static_mutex = (self.eff @ eff_negated.T) | (self.eff @ pre_negated.T) | (self.pre @ eff_negated.T)
+        np.fill_diagonal(self.static_mutex, False)
+
+
+def matrix_problem(problem: Problem) -> MatrixProblem:
+    """return the MatrixProblem of a problem, building it on first use
+
+    :param problem: PlanningProblem
+    :return: MatrixProblem
+    """
+    matrices = getattr(problem, '_matrix_problem', None)
+    if matrices is None:
+        matrices = MatrixProblem(problem)
+        problem._matrix_problem = matrices
+    return matrices
+
+
+class MatrixPlanningGraph():
+    """
+    A planning graph as described in chapter 10 of the AIMA text, with the
+    levels stored as boolean vectors and the mutexes as boolean matrices.
+    """
+
+    def __init__(self, problem: Problem, state, serial_planning=True):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        :param state: PackedState (or str in form TFTTFF... representing fluent states)
+        :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+        Instance variable calculated:
+            matrices: MatrixProblem shared by all graphs of the problem
+            s_levels: list of bool arrays (literals,), the literals of each S-level
+            a_levels: list of bool arrays (actions,), the actions of each A-level
+            s_mutex: list of bool arrays (literals, literals), the mutex pairs of each S-level
+            a_mutex: list of bool arrays (actions, actions), the mutex pairs of each A-level
+        """
+        self.problem = problem
+        self.serial = serial_planning
+        self.matrices = matrix_problem(problem)
+        self.s_levels = []
+        self.a_levels = []
+        self.s_mutex = []
+        self.a_mutex = []
+        self.create_graph(state)
+
+    def create_graph(self, state):
+        """ build the planning graph from S0 until the last two S levels contain the same literals and mutexes
+
+        :param state: PackedState or str
+        :return:
+            fills s_levels, a_levels, s_mutex and a_mutex
+        """
+        if self.s_levels or self.a_levels:
+            raise Exception(
+                'Planning Graph already created; construct a new planning graph for each new state in the planning sequence')
+        cp = self.matrices.compiled
+        s_level = np.zeros(cp.num_literals, dtype=bool)
+        s_level[list(bits(cp.state_literals(state)))] = True
+        self.s_levels.append(s_level)
+        # no mutexes at the first level
+        self.s_mutex.append(np.zeros((cp.num_literals, cp.num_literals), dtype=bool))
+        level = 0
+        leveled = False
+        while not leveled:
+            self.add_action_level(level)
+            level += 1
+            self.add_literal_level(level)
+            if np.array_equal(self.s_levels[level], self.s_levels[level - 1]) and \
+                    np.array_equal(self.s_mutex[level], self.s_mutex[level - 1]):
+                leveled = True
+
+    def add_action_level(self, level: int):
+        """ add an A level and its mutexes to the graph
+
+        :param level: int
+        :return:
+            appends to a_levels and a_mutex
+        """
+        m = self.matrices
+        s_level = self.s_levels[level]
+        # the actions having no precondition outside of the level
+        a_level = ~m.pre[:, ~s_level].any(axis=1)
+
+        a_mutex = m.static_mutex.copy()
+        if self.serial:
+            serial = a_level & ~m.persistent
+            a_mutex |= np.outer(serial, serial)
+        # competing needs: a precondition of one action is mutex with a precondition of the other
+        a_mutex |= (m.pre_f @ self.s_mutex[level].astype(np.float32)) @ m.pre_f.T > 0
+        a_mutex &= np.outer(a_level, a_level)
+        np.fill_diagonal(a_mutex, False)
+        self.a_levels.append(a_level)
+        self.a_mutex.append(a_mutex)
+
+    def add_literal_level(self, level: int):
+        """ add an S level and its mutexes to the graph
+
+        :param level: int
+        :return:
+            appends to s_levels and s_mutex
+        """
+        m = self.matrices
+        a_level = self.a_levels[level - 1]
+        producers = m.eff & a_level[:, None]
+        s_level = producers.any(axis=0)
+
+        # inconsistent support: no pair of producers of the two literals is free of mutex
+        producers = producers.astype(np.float32)
+        not_mutex = (~self.a_mutex[level - 1]).astype(np.float32)
+        s_mutex = producers.T @ not_mutex @ producers == 0
+        # negation
+        s_mutex[np.arange(len(s_level)), m.negation] = True
+        s_mutex &= np.outer(s_level, s_level)
+        np.fill_diagonal(s_mutex, False)
+        self.s_levels.append(s_level)
+        self.s_mutex.append(s_mutex)
+
+    def is_mutex_s(self, level: int, literal1: int, literal2: int) -> bool:
+        """Boolean test for mutual exclusion of two literals of an S-level
+
+        :param level: int
+        :param literal1: int
+        :param literal2: int
+        :return: bool
+        """
+        return bool(self.s_mutex[level][literal1, literal2])
+
+    def is_mutex_a(self, level: int, action1: int, action2: int) -> bool:
+        """Boolean test for mutual exclusion of two actions of an A-level
+
+        :param level: int
+        :param action1: int
+        :param action2: int
+        :return: bool
+        """
+        return bool(self.a_mutex[level][action1, action2])
+
+    def h_levelsum(self) -> int:
+        """The sum of the level costs of the individual goals (admissible if goals independent)
+
+        :return: int
+        """
+        index = self.matrices.compiled.index
+        level_sum = 0
+        for goal in self.problem.goal:
+            for level, s_level in enumerate(self.s_levels):
+                if s_level[index[goal]]:
+                    level_sum += level
+                    break
+        return level_sum
@@ -0,0 +1,114 @@
+"""Reachability and relevance pruning of ground actions and fluents
+
+Grounding an action schema creates every combination of its arguments, including actions
+that can never be applied from the initial state and actions whose effects never help to
+reach the goal.  `prune_problem` runs, on the delete relaxation of the problem,
+
+* a forward reachability pass from the initial state: an action is reachable when its
+  positive preconditions can become true and its negative preconditions can be false;
+* a backward relevance pass from the goal over the reachable actions: a fluent is relevant
+  when it is a goal or a precondition of a relevant action, and an action is relevant when
+  it adds a relevant fluent or removes one that a relevant action needs false.
+
+Only the reachable and relevant actions are kept.  The fluents that are not relevant are
+never read by a goal or a precondition, so they are dropped from the state and from the
+effects of the kept actions.  Both passes over-approximate, so no plan is lost.
+"""
+import copy
+
+from lp_utils import FluentState
+
+
+def reachable_actions(initial: FluentState, actions: list) -> list:
+    """ the actions applicable in some state of the delete relaxation, in their original order
+
+    :param initial: FluentState, the initial state
+    :param actions: list of Action
+    :return: list of Action
+    """
+    can_be_true = set(initial.pos)
+    can_be_false = set(initial.neg)
+    reached = [False] * len(actions)
+    changed = True
+    while changed:
+        changed = False
+        for i, action in enumerate(actions):
+            if reached[i]:
+                continue
+            if all(p in can_be_true for p in action.precond_pos) and \
+                    all(p in can_be_false for p in action.precond_neg):
+                reached[i] = changed = True
+                can_be_true.update(action.effect_add)
+                can_be_false.update(action.effect_rem)
+    return [action for i, action in enumerate(actions) if reached[i]]
+
+
+def relevant_actions(goal: list, actions: list) -> tuple:
+    """ the actions that can contribute to the goal, in their original order, and the fluents they read
+
+    :param goal: list of expr, the positive goal fluents
+    :param actions: list of Action
+    :return: tuple of (list of Action, set of expr)
+    """
+    needed_true = set(goal)
+    needed_false = set()
+    relevant = [False] * len(actions)
+    changed = True
+    while changed:
+        changed = False
+        for i, action in enumerate(actions):
+            if relevant[i]:
+                continue
+            if any(e in needed_true for e in action.effect_add) or \
+                    any(e in needed_false for e in action.effect_rem):
+                relevant[i] = changed = True
+                needed_true.update(action.precond_pos)
+                needed_false.update(action.precond_neg)
+    return [action for i, action in enumerate(actions) if relevant[i]], needed_true | needed_false
+
+
+def restrict_effects(action, fluents: set):
+    """ the action, or a copy of it without the effects on fluents outside of the set
+
+    :param action: Action
+    :param fluents: set of expr
+    :return: Action
+    """
+    if all(e in fluents for e in action.effect_add) and all(e in fluents for e in action.effect_rem):
+        return action
+    restricted = copy.copy(action)
+    restricted.effect_add = [e for e in action.effect_add if e in fluents]
+    restricted.effect_rem = [e for e in action.effect_rem if e in fluents]
+    return restricted
+
+
+def prune_problem(initial: FluentState, goal: list, actions: list) -> tuple:
+    """ drop the unreachable and irrelevant actions and the fluents no kept action or goal reads
+
+    :param initial: FluentState, the initial state over all fluents
+    :param goal: list of expr
+    :param actions: list of Action, the ground actions
+    :return: tuple of (FluentState, list of Action, dict), the initial state over the kept
+        fluents, the kept actions and the pruning statistics
+    """
+    reachable = reachable_actions(initial, actions)
+    relevant, fluents = relevant_actions(goal, reachable)
+    kept_actions = [restrict_effects(action, fluents) for action in relevant]
+    kept_initial = FluentState([f for f in initial.pos if f in fluents], [f for f in initial.neg if f in fluents])
+    stats = {'actions': len(actions),
+             'unreachable_actions': len(actions) - len(reachable),
+             'irrelevant_actions': len(reachable) - len(relevant),
+             'fluents': len(initial.pos) + len(initial.neg),
+             'pruned_fluents': len(initial.pos) + len(initial.neg) - len(kept_initial.pos) - len(kept_initial.neg)}
+    return kept_initial, kept_actions, stats
+
+
+def format_pruning_stats(stats: dict) -> str:
+    """ one line summary of the statistics returned by prune_problem
+
+    :param stats: dict
+    :return: str
+    """
+    return 'Pruned {} of {} actions ({} unreachable, {} irrelevant) and {} of {} fluents'.format(
+        stats['unreachable_actions'] + stats['irrelevant_actions'], stats['actions'],
+        stats['unreachable_actions'], stats['irrelevant_actions'], stats['pruned_fluents'], stats['fluents'])
@@ -1,11 +1,16 @@
 import argparse
+import inspect
+from functools import partial
 from timeit import default_timer as timer
 from aimacode.search import InstrumentedProblem
 from aimacode.search import (breadth_first_search, astar_search,
     breadth_first_tree_search, depth_first_graph_search, uniform_cost_search,
     greedy_best_first_graph_search, depth_limited_search,
-    recursive_best_first_search)
+    recursive_best_first_search, iterative_deepening_astar_search, TIE_BREAKING)
 from my_air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3
+from graphplan import graphplan_search, parallel_graphplan_search
+from pruning import format_pruning_stats
+import heuristic_cache
 
 PROBLEM_CHOICE_MSG = """
 Select from the following list of air cargo problems. You may choose more than
@@ -36,6 +41,15 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_1'],
             ['astar_search', astar_search, 'h_ignore_preconditions'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
+            ['astar_search', astar_search, 'h_pg_maxlevel'],
+            ['astar_search', astar_search, 'h_pg_setlevel'],
+            ['astar_search', astar_search, 'h_pg_add'],
+            ['astar_search', astar_search, 'h_pg_max'],
+            ['astar_search', astar_search, 'h_pg_ff'],
+            ['graphplan_search', graphplan_search, ""],
+            ['parallel_graphplan_search', parallel_graphplan_search, ""],
+            ['astar_search', astar_search, 'h_ignore_preconditions_greedy'],
+            ['iterative_deepening_astar_search', iterative_deepening_astar_search, 'h_ignore_preconditions'],
             ]
 
 
@@ -46,11 +60,17 @@ class PrintableProblem(InstrumentedProblem):
     """
 
     def __repr__(self):
-        return '{:^10d}  {:^10d}  {:^10d}'.format(self.succs, self.goal_tests, self.states)
+        cache = heuristic_cache.heuristic_cache
+        return '{:^10d}  {:^10d}  {:^10d}  {:^10d}  {:^10d}  {:^10d}'.format(
+            self.succs, self.goal_tests, self.states, cache.hits, cache.misses, cache.evictions)
 
 
 def run_search(problem, search_function, parameter=None):
 
+    # every run starts from an empty cache, so the times and cache counts of runs are comparable
+    cache = heuristic_cache.heuristic_cache
+    cache.clear()
+    cache.reset_stats()
     start = timer()
     ip = PrintableProblem(problem)
     if parameter is not None:
@@ -58,7 +78,7 @@ def run_search(problem, search_function, parameter=None):
     else:
         node = search_function(ip)
     end = timer()
-    print("\nExpansions   Goal Tests   New Nodes")
+    print("\nExpansions   Goal Tests   New Nodes   Cache Hits  Cache Miss  Evictions")
     print("{}\n".format(ip))
     show_solution(node, end - start)
     print()
@@ -85,7 +105,7 @@ def manual():
                                                " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, tie_breaking=None):
 
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
@@ -97,7 +117,11 @@ def main(p_choices, s_choices):
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
             _p = p()
+            if getattr(_p, 'pruning_stats', None):
+                print(format_pruning_stats(_p.pruning_stats))
             _h = None if not h else getattr(_p, h)
+            if tie_breaking and 'tie_breaking' in inspect.signature(s).parameters:
+                s = partial(s, tie_breaking=tie_breaking)
             run_search(_p, s, _h)
 
 
@@ -117,14 +141,22 @@ if __name__=="__main__":
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
     parser.add_argument('-a', '--all', action='store_true')
+    parser.add_argument('-t', '--tie-breaking', choices=sorted(TIE_BREAKING), default=None,
+                        help="How the best-first searches order nodes of equal f. "
+                             "Default: state; low_h searches lower h first.")
+    parser.add_argument('--cache-size', type=int, default=8192,
+                        help="Number of heuristic values kept by the heuristic cache. Default: 8192.")
+    parser.add_argument('--cache-policy', choices=sorted(heuristic_cache.CACHE_POLICIES), default='lru',
+                        help="Eviction policy of the heuristic cache. Default: lru.")
     args = parser.parse_args()
+    heuristic_cache.configure_heuristic_cache(args.cache_size, args.cache_policy)
 
     if args.manual:
         manual()
     elif args.all:
-        main(range(1, len(PROBLEMS)), range(1, len(SEARCHES)))
+        main(range(1, len(PROBLEMS)), range(1, len(SEARCHES)), args.tie_breaking)
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))), args.tie_breaking)
     else:
         print()
         parser.print_help()
@@ -0,0 +1,275 @@
+"""SAS+ translation: mutex groups of fluents and a finite-domain state encoding
+
+In the propositional encoding of `state_map` a plane at one of K airports takes K bits,
+and a cargo at one of K airports or in one of M planes takes K + M bits, although exactly
+one of them is true in every reachable state.  `mutex_groups` finds such groups on the
+ground actions (a ground version of the monotonicity invariants of Helmert's Fast
+Downward translator):
+
+* candidate groups are the connected components of the (added fluent, deleted
+  precondition) pairs of the actions: Load(C1, P1, SFO) moves the true fluent of the
+  cargo from At(C1, SFO) to In(C1, P1), and Fly(P1, SFO, JFK) moves the plane from
+  At(P1, SFO) to At(P1, JFK);
+* a candidate is kept when at most one of its fluents is true initially and every action
+  preserves that: it adds at most one fluent of the group, only together with the removal
+  of a precondition of the group, and every fluent of the group it removes without adding
+  another is a precondition.  Fluents read as negative preconditions are left out.
+
+`SASTask` turns each group into a variable whose value is its true fluent (or `None` when
+the group may have no true fluent), and every other fluent into a binary variable.  A state
+packs the value index of each variable in ceil(log2(domain size)) bits, and an action
+becomes an operator whose preconditions and effects are a mask and a value over those bits,
+so applicability is one masked comparison and the result one masked assignment.
+"""
+from aimacode.search import Problem
+from lp_utils import FluentState, PackedState, decode_state, encode_packed_state, fluent_bits
+
+
+def candidate_groups(fluents: list, actions: list) -> list:
+    """ the components of the fluents linked by an action adding one and deleting the other as a precondition
+
+    :param fluents: list of expr, the fluents of the problem
+    :param actions: list of Action
+    :return: list of list of expr, the components of more than one fluent, in the order of fluents
+    """
+    parent = {f: f for f in fluents}
+
+    def find(f):
+        while parent[f] != f:
+            parent[f] = parent[parent[f]]
+            f = parent[f]
+        return f
+
+    for action in actions:
+        for deleted in action.effect_rem:
+            if deleted in action.precond_pos and deleted in parent:
+                for added in action.effect_add:
+                    if added in parent:
+                        parent[find(added)] = find(deleted)
+    components = {}
+    for f in fluents:
+        components.setdefault(find(f), []).append(f)
+    return [group for group in components.values() if len(group) > 1]
+
+
+def is_invariant(group: list, initial: FluentState, actions: list) -> bool:
+    """ whether at most one fluent of the group is true initially and after every action
+
+    :param group: list of expr
+    :param initial: FluentState
+    :param actions: list of Action
+    :return: bool
+    """
+    members = set(group)
+    if sum(f in members for f in initial.pos) > 1:
+        return False
+    for action in actions:
+        if any(f in members for f in action.precond_neg):
+            return False
+        added = [f for f in action.effect_add if f in members]
+        required = [f for f in action.precond_pos if f in members]
+        removed = [f for f in action.effect_rem if f in members and f not in added]
+        if len(added) > 1 or len(required) > 1:
+            return False
+        if added and added != required and not (required and required[0] in removed):
+            return False
+        if any(f not in required for f in removed):
+            return False
+    return True
+
+
+def mutex_groups(initial: FluentState, actions: list) -> list:
+    """ the groups of fluents of which at most one is true in every reachable state
+
+    :param initial: FluentState, the initial state over all fluents
+    :param actions: list of Action
+    :return: list of list of expr
+    """
+    return [group for group in candidate_groups(initial.pos + initial.neg, actions)
+            if is_invariant(group, initial, actions)]
+
+
+class SASOperator():
+    """An action as preconditions and effects over the packed variable values of a SASTask"""
+    __slots__ = ('action', 'pre', 'pre_mask', 'pre_value', 'eff_mask', 'eff_value')
+
+    def __init__(self, action, pre: dict, eff: dict, task: 'SASTask'):
+        """
+        :param action: Action
+        :param pre: dict, the value index required of each variable
+        :param eff: dict, the value index given to each variable
+        :param task: SASTask, giving the bit offset and mask of each variable
+        """
+        self.action = action
+        self.pre = pre
+        self.pre_mask, self.pre_value = task.mask_value(pre)
+        self.eff_mask, self.eff_value = task.mask_value(eff)
+
+    def applicable(self, state: int) -> bool:
+        return state & self.pre_mask == self.pre_value
+
+    def apply(self, state: int) -> int:
+        return state & ~self.eff_mask | self.eff_value
+
+
+class SASTask():
+    """Finite-domain variables over the fluents of a problem, with the actions as operators (see `sas_task`)"""
+
+    def __init__(self, state_map: list, initial: FluentState, actions: list, groups: list):
+        """
+        :param state_map: list of expr, the fluents of the problem in PackedState order
+        :param initial: FluentState, the initial state
+        :param actions: list of Action
+        :param groups: list of list of expr, mutex groups of fluents (see `mutex_groups`)
+        Instance variables calculated:
+            fluents: list of expr, state_map
+            bits: dict, the PackedState bit of each fluent
+            domains: list of list, the values of each variable: None first when the variable
+                may have no true fluent, then its fluents
+            fluent_value: dict, the (variable, value index) of each fluent
+            offsets: list of int, the first bit of each variable in a packed state
+            widths: list of int, the number of bits of each variable
+            num_bits: int, the number of bits of a packed state
+            operators: list of SASOperator, one per action
+            index: dict, the operators by the (variable, value index) of their first precondition
+            unindexed: list of SASOperator without preconditions
+            initial: int, the packed initial state
+        """
+        self.fluents = list(state_map)
+        self.bits = fluent_bits(self.fluents)
+        true = set(initial.pos)
+        grouped = set()
+        first = {f: i for i, f in enumerate(self.fluents)}
+        self.domains = []
+        for group in sorted(groups, key=lambda g: first[g[0]]):
+            members = set(group)
+            grouped.update(members)
+            # no fluent of the group is true initially, or an action removes one without adding another
+            may_be_empty = not (members & true) or any(
+                any(f in members for f in a.effect_rem) and not any(f in members for f in a.effect_add)
+                for a in actions)
+            self.domains.append(([None] if may_be_empty else []) + sorted(group, key=first.get))
+        for f in self.fluents:
+            if f not in grouped:
+                self.domains.append([None, f])
+        self.fluent_value = {}
+        for var, domain in enumerate(self.domains):
+            for val, f in enumerate(domain):
+                if f is not None:
+                    self.fluent_value[f] = (var, val)
+        self.widths = [max(1, (len(domain) - 1).bit_length()) for domain in self.domains]
+        self.offsets = []
+        offset = 0
+        for width in self.widths:
+            self.offsets.append(offset)
+            offset += width
+        self.num_bits = offset
+        self.operators = [self.operator(action) for action in actions]
+        self.index = {}
+        self.unindexed = []
+        for op in self.operators:
+            if op.pre:
+                self.index.setdefault(min(op.pre.items()), []).append(op)
+            else:
+                self.unindexed.append(op)
+        self.initial = self.encode(encode_packed_state(initial, self.fluents))
+
+    def mask_value(self, assignment: dict) -> tuple:
+        """ the bits of the variables of an assignment and their packed values
+
+        :param assignment: dict, value index by variable
+        :return: tuple of (int, int)
+        """
+        mask = value = 0
+        for var, val in assignment.items():
+            mask |= ((1 << self.widths[var]) - 1) << self.offsets[var]
+            value |= val << self.offsets[var]
+        return mask, value
+
+    def operator(self, action) -> SASOperator:
+        """ the operator of an action whose negative preconditions are on binary variables
+
+        :param action: Action
+        :return: SASOperator
+        """
+        pre = {}
+        for f in action.precond_pos:
+            var, val = self.fluent_value[f]
+            pre[var] = val
+        for f in action.precond_neg:
+            var, _ = self.fluent_value[f]
+            pre[var] = 0
+        eff = {}
+        for f in action.effect_rem:
+            var, _ = self.fluent_value[f]
+            if self.domains[var][0] is None:
+                eff[var] = 0
+        for f in action.effect_add:
+            var, val = self.fluent_value[f]
+            eff[var] = val
+        return SASOperator(action, pre, eff, self)
+
+    def value(self, state: int, var: int) -> int:
+        """ the value index of a variable in a packed state
+
+        :param state: int
+        :param var: int
+        :return: int
+        """
+        return state >> self.offsets[var] & ((1 << self.widths[var]) - 1)
+
+    def encode(self, state: PackedState) -> int:
+        """ the packed variable values of a state of the propositional encoding
+
+        :param state: PackedState satisfying the mutex groups
+        :return: int
+        """
+        bits = self.bits
+        packed = 0
+        for var, domain in enumerate(self.domains):
+            values = [val for val, f in enumerate(domain) if f is not None and state & bits[f]]
+            if len(values) > 1 or (not values and domain[0] is not None):
+                raise ValueError('state {} breaks the mutex group {}'.format(state, domain))
+            packed |= (values[0] if values else 0) << self.offsets[var]
+        return packed
+
+    def decode(self, state: int) -> PackedState:
+        """ the state of the propositional encoding of packed variable values
+
+        :param state: int
+        :return: PackedState
+        """
+        fluents = 0
+        for var, domain in enumerate(self.domains):
+            f = domain[self.value(state, var)]
+            if f is not None:
+                fluents |= self.bits[f]
+        return PackedState.from_fluents(fluents, len(self.fluents))
+
+    def applicable(self, state: int) -> list:
+        """ the operators applicable in a packed state
+
+        :param state: int
+        :return: list of SASOperator
+        """
+        index = self.index
+        ops = [op for op in self.unindexed]
+        for var in range(len(self.domains)):
+            candidates = index.get((var, self.value(state, var)))
+            if candidates:
+                ops.extend(op for op in candidates if op.applicable(state))
+        return ops
+
+
+def sas_task(problem: Problem) -> SASTask:
+    """ the SASTask of a problem, built on first use
+
+    :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+    :return: SASTask
+    """
+    task = getattr(problem, '_sas_task', None)
+    if task is None:
+        initial = decode_state(problem.initial, problem.state_map)
+        task = SASTask(problem.state_map, initial, problem.actions_list, mutex_groups(initial, problem.actions_list))
+        problem._sas_task = task
+    return task
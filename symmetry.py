@@ -0,0 +1,115 @@
+"""Object symmetries of planning problems and canonical states for duplicate detection
+
+Two objects of a problem are interchangeable when swapping their names everywhere maps
+the fluents, the actions, the initial state and the goal onto themselves, e.g. two planes
+waiting at the same airport, or two cargos with the same starting airport and destination.
+Swapping two interchangeable objects in a state then gives a state with the same
+solutions up to the swap, so a graph search needs to explore only one of them.
+
+`Symmetry` partitions the objects into classes of interchangeable objects.  Its
+`canonical` state renames the objects of each class in the order of their fluents (the
+objects holding the "largest" fluents first), so symmetric states usually share a
+canonical state and the searches of `aimacode.search` can detect them as duplicates
+through `Problem.canonical`.  Classes are renamed one after the other, so two symmetric
+states may still keep different canonical states, which only costs some pruning: a
+canonical state is always the image of the state under a symmetry.
+"""
+from aimacode.search import Problem
+from aimacode.utils import Expr
+from lp_utils import decode_state
+
+
+def rename(fluent: Expr, names: dict) -> Expr:
+    """ the fluent with its arguments renamed
+
+    :param fluent: Expr, e.g. At(C1, SFO)
+    :param names: dict, the new name of some object names
+    :return: Expr
+    """
+    return Expr(fluent.op, *(Expr(names.get(arg.op, arg.op)) for arg in fluent.args))
+
+
+class Symmetry():
+    """Classes of interchangeable objects of a problem and the canonical form of its states"""
+
+    def __init__(self, problem: Problem, object_lists: list):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem)
+        :param object_lists: list of list of str, the objects that may be interchangeable
+            (e.g. cargos, planes and airports), only objects of the same list are compared
+        Instance variables calculated:
+            classes: list of list of str, the classes of two or more interchangeable objects
+            orbits: list of tuple, per class the bit of each fluent of each object, the fluents
+                of an object in the order of those of the first object of its class
+            mask: list of int, per class the bits of all the fluents of its objects
+        """
+        self.state_map = list(problem.state_map)
+        self.fluents = set(self.state_map)
+        self.num_fluents = len(self.state_map)
+        self.true = set(decode_state(problem.initial, self.state_map).pos)
+        self.goal = set(problem.goal)
+        self.actions = {(a.name, a.args) for a in problem.actions_list}
+        bit_of = {f: 1 << (self.num_fluents - 1 - i) for i, f in enumerate(self.state_map)}
+        self.classes = []
+        for objects in object_lists:
+            classes = []
+            for obj in objects:
+                for cls in classes:
+                    if self.interchangeable(cls[0], obj):
+                        cls.append(obj)
+                        break
+                else:
+                    classes.append([obj])
+            self.classes.extend(cls for cls in classes if len(cls) > 1 and self.separable(cls))
+        self.orbits = []
+        self.mask = []
+        for cls in self.classes:
+            first = [f for f in self.state_map if any(arg.op == cls[0] for arg in f.args)]
+            orbit = tuple(tuple(bit_of[rename(f, {cls[0]: obj, obj: cls[0]})] for f in first) for obj in cls)
+            self.orbits.append(orbit)
+            mask = 0
+            for bits in orbit:
+                for bit in bits:
+                    mask |= bit
+            self.mask.append(mask)
+
+    def interchangeable(self, a: str, b: str) -> bool:
+        """ whether swapping the two objects maps the fluents, actions, initial state and goal onto themselves
+
+        :param a: str
+        :param b: str
+        :return: bool
+        """
+        swap = {a: b, b: a}
+        return all(rename(f, swap) in self.fluents for f in self.fluents) and \
+            all(rename(f, swap) in self.true for f in self.true) and \
+            all(rename(f, swap) in self.goal for f in self.goal) and \
+            all((name, tuple(Expr(swap.get(arg.op, arg.op)) for arg in args)) in self.actions
+                for name, args in self.actions)
+
+    def separable(self, cls: list) -> bool:
+        """ whether no fluent names two objects of the class, so each fluent belongs to one object
+
+        :param cls: list of str
+        :return: bool
+        """
+        members = set(cls)
+        return all(sum(arg.op in members for arg in f.args) <= 1 for f in self.state_map)
+
+    def canonical(self, state: int) -> int:
+        """ the state with the objects of each class renamed in decreasing order of their fluents
+
+        :param state: PackedState
+        :return: PackedState of the same type as state
+        """
+        for orbit, mask in zip(self.orbits, self.mask):
+            profiles = sorted((tuple(bool(state & bit) for bit in bits), i) for i, bits in enumerate(orbit))
+            profiles.reverse()
+            moved = 0
+            for target, (profile, _) in zip(orbit, profiles):
+                for bit, holds in zip(target, profile):
+                    if holds:
+                        moved |= bit
+            if moved != state & mask:
+                state = type(state)(state & ~mask | moved)
+        return state
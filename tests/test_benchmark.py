@@ -0,0 +1,34 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import json
+import unittest
+from benchmark import benchmark, parse_size
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('3,2,4'), (3, 2, 4))
+
+    def test_records(self):
+        results = benchmark([(2, 2, 2), (3, 2, 3)], [1, 9], seed=1)
+        self.assertEqual([(r['cargos'], r['search']) for r in results], [(2, 1), (2, 9), (3, 1), (3, 9)])
+        for record in results:
+            self.assertTrue(record['solved'])
+            self.assertGreater(record['expansions'], 0)
+            self.assertGreater(record['peak_memory'], 0)
+        bfs, astar = results[:2]
+        self.assertEqual(bfs['plan_length'], astar['plan_length'])
+        self.assertEqual(bfs['heuristic_calls'], 0)
+        self.assertGreater(astar['heuristic_calls'], 0)
+        self.assertEqual(json.loads(json.dumps(results)), results)
+
+    def test_no_memory(self):
+        record = benchmark([(2, 2, 2)], [9], measure_memory=False)[0]
+        self.assertIsNone(record['peak_memory'])
+
+
+if __name__ == '__main__':
+    unittest.main()
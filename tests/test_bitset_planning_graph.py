@@ -0,0 +1,62 @@
+import os
+import sys
+
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+from my_planning_graph import PlanningGraph
+from bitset_planning_graph import BitsetPlanningGraph, compile_problem, bits
+
+
+def node_levels(pg):
+    """levels and mutex pairs of a PlanningGraph as comparable python values"""
+    s_levels = [{(n.symbol, n.is_pos) for n in level} for level in pg.s_levels]
+    a_levels = [{str(n.action) for n in level} for level in pg.a_levels]
+    s_mutex = [{frozenset([(n.symbol, n.is_pos), (m.symbol, m.is_pos)]) for n in level for m in n.mutex}
+               for level in pg.s_levels]
+    a_mutex = [{frozenset([str(n.action), str(m.action)]) for n in level for m in n.mutex}
+               for level in pg.a_levels]
+    return s_levels, a_levels, s_mutex, a_mutex
+
+
+def bitset_levels(pg):
+    """levels and mutex pairs of a BitsetPlanningGraph as comparable python values"""
+    cp = pg.compiled
+    s_levels = [{cp.literal(l) for l in bits(level)} for level in pg.s_levels]
+    a_levels = [{str(cp.action(a)) for a in bits(level)} for level in pg.a_levels]
+    s_mutex = [{frozenset([cp.literal(l), cp.literal(m)]) for l, mask in mutex.items() for m in bits(mask)}
+               for mutex in pg.s_mutex]
+    a_mutex = [{frozenset([str(cp.action(a)), str(cp.action(b))]) for a, mask in mutex.items() for b in bits(mask)}
+               for mutex in pg.a_mutex]
+    return s_levels, a_levels, s_mutex, a_mutex
+
+
+class TestBitsetPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.p = have_cake()
+        self.pg = BitsetPlanningGraph(self.p, self.p.initial)
+
+    def test_level_sizes(self):
+        self.assertEqual(bin(self.pg.a_levels[0]).count('1'), 3)
+        self.assertEqual(bin(self.pg.a_levels[1]).count('1'), 6)
+        self.assertEqual([bin(s).count('1') for s in self.pg.s_levels[:3]], [2, 4, 4])
+
+    def test_levelsum(self):
+        self.assertEqual(self.pg.h_levelsum(), 1)
+
+    def test_compiled_once(self):
+        self.assertIs(compile_problem(self.p), self.pg.compiled)
+
+    def test_same_as_planning_graph(self):
+        for problem in (self.p, air_cargo_p1(), air_cargo_p2()):
+            for serial in (True, False):
+                pg = PlanningGraph(problem, problem.initial, serial_planning=serial)
+                bpg = BitsetPlanningGraph(problem, problem.initial, serial_planning=serial)
+                self.assertEqual(node_levels(pg), bitset_levels(bpg))
+                self.assertEqual(pg.h_levelsum(), bpg.h_levelsum())
+
+
+if __name__ == '__main__':
+    unittest.main()
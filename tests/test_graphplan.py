@@ -0,0 +1,81 @@
+import os
+import sys
+
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.planning import Action
+from aimacode.utils import expr
+from example_have_cake import HaveCakeProblem, have_cake
+from lp_utils import FluentState, PackedState
+from my_air_cargo_problems import air_cargo_p1
+from graphplan import GraphPlan, graphplan_search, parallel_graphplan_search
+
+
+class EitherOrProblem(HaveCakeProblem):
+    """two goals that can each be reached but never hold together"""
+
+    def get_actions(self):
+        make_x = Action(expr('MakeX()'), [[], []], [[expr('X')], [expr('Y')]])
+        make_y = Action(expr('MakeY()'), [[], []], [[expr('Y')], [expr('X')]])
+        return [make_x, make_y]
+
+
+class TestGraphPlan(unittest.TestCase):
+
+    def test_have_cake(self):
+        p = have_cake()
+        node = graphplan_search(p)
+        self.assertTrue(p.goal_test(node.state))
+        self.assertEqual([a.name for a in node.solution()], ['Eat', 'Bake'])
+
+    def test_air_cargo_serial(self):
+        p = air_cargo_p1()
+        node = graphplan_search(p)
+        self.assertTrue(p.goal_test(node.state))
+        self.assertEqual(len(node.solution()), 6)
+
+    def test_air_cargo_parallel(self):
+        p = air_cargo_p1()
+        planner = GraphPlan(p, serial_planning=False)
+        steps = planner.solve()
+        self.assertEqual(len(steps), 3)
+        node = parallel_graphplan_search(p)
+        self.assertTrue(p.goal_test(node.state))
+
+    def test_nogoods_memoized(self):
+        p = air_cargo_p1()
+        planner = GraphPlan(p)
+        planner.solve()
+        self.assertTrue(planner.nogoods)
+        calls = []
+        assign = planner.assign
+
+        def counting_assign(*args):
+            calls.append(args)
+            return assign(*args)
+        planner.assign = counting_assign
+        for level, goals in planner.nogoods:
+            self.assertIsNone(planner.extract(goals, level))
+        self.assertEqual(calls, [])
+        # without the memo the same extractions search the achievers again
+        nogoods = list(planner.nogoods)
+        planner.nogoods = set()
+        for level, goals in nogoods:
+            self.assertIsNone(planner.extract(goals, level))
+        self.assertTrue(calls)
+
+    def test_unreachable_goal(self):
+        p = have_cake()
+        p.goal = [expr('Eaten(Pie)')]
+        p.state_map = p.state_map + [expr('Eaten(Pie)')]
+        p.initial = PackedState.from_string(str(p.initial) + 'F')
+        self.assertIsNone(graphplan_search(p))
+
+    def test_leveled_off_termination(self):
+        p = EitherOrProblem(FluentState([], [expr('X'), expr('Y')]), [expr('X'), expr('Y')])
+        self.assertIsNone(graphplan_search(p, serial_planning=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import sys
+
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import contextlib
+import gc
+import io
+import random
+import unittest
+import weakref
+from aimacode.planning import Action
+from aimacode.search import Node, astar_search
+from aimacode.utils import expr
+import heuristic_cache
+from heuristic_cache import LRUCache, ARCCache, configure_heuristic_cache, problem_fingerprint
+from example_have_cake import HaveCakeProblem
+from lp_utils import FluentState
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+from run_search import run_search
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_eviction_order(self):
+        cache = LRUCache(2)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        self.assertEqual(cache.get('a', lambda: None), 1)
+        cache.get('c', lambda: 3)
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2})
+
+
+class TestARCCache(unittest.TestCase):
+
+    def test_random_workload(self):
+        rng = random.Random(0)
+        cache = ARCCache(50)
+        for _ in range(5000):
+            key = int(rng.paretovariate(1.0)) if rng.random() < 0.7 else rng.randrange(1000)
+            self.assertEqual(cache.get(key, lambda: key * 2), key * 2)
+            self.assertLessEqual(len(cache), 50)
+            self.assertLessEqual(len(cache) + len(cache.b1) + len(cache.b2), 100)
+            self.assertTrue(0 <= cache.p <= 50)
+        self.assertEqual(cache.hits + cache.misses, 5000)
+        self.assertEqual(cache.misses - cache.evictions, len(cache))
+
+    def test_frequent_keys_survive_scan(self):
+        cache = ARCCache(10)
+        for _ in range(2):
+            for key in range(5):
+                cache.get(key, lambda: key)
+        for key in range(100, 200):
+            cache.get(key, lambda: key)
+        self.assertTrue(all(key in cache.t2 for key in range(5)))
+
+
+class TestCachedHeuristic(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = configure_heuristic_cache(maxsize=100, policy='lru')
+
+    def tearDown(self):
+        configure_heuristic_cache()
+
+    def test_shared_by_state(self):
+        p = air_cargo_p1()
+        self.assertEqual(p.h_pg_levelsum(Node(p.initial)), 4)
+        self.assertEqual(air_cargo_p1().h_pg_levelsum(Node(p.initial)), 4)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(problem_fingerprint(p), problem_fingerprint(air_cargo_p1()))
+        self.assertNotEqual(problem_fingerprint(p), problem_fingerprint(air_cargo_p2()))
+
+    def test_fingerprint_keeps_polarity(self):
+        initial = FluentState([expr('Have(Cake)')], [expr('Eaten(Cake)')])
+        goal = [expr('Have(Cake)'), expr('Eaten(Cake)')]
+        p = HaveCakeProblem(initial, goal)
+        q = HaveCakeProblem(initial, goal)
+        # Eat(Cake) with its precondition negated, then with its effects swapped
+        q.actions_list[0] = Action(expr('Eat(Cake)'), [[], [expr('Have(Cake)')]],
+                                   [[expr('Eaten(Cake)')], [expr('Have(Cake)')]])
+        self.assertNotEqual(problem_fingerprint(p), problem_fingerprint(q))
+        r = HaveCakeProblem(initial, goal)
+        r.actions_list[0] = Action(expr('Eat(Cake)'), [[expr('Have(Cake)')], []],
+                                   [[expr('Have(Cake)')], [expr('Eaten(Cake)')]])
+        self.assertNotEqual(problem_fingerprint(p), problem_fingerprint(r))
+        self.assertEqual(problem_fingerprint(p), problem_fingerprint(HaveCakeProblem(initial, goal)))
+
+    def test_fingerprint_compared_in_full(self):
+        p = air_cargo_p1()
+        fingerprint = problem_fingerprint(p)
+        self.assertEqual(hash(fingerprint), hash(fingerprint.definition))
+        other = type(fingerprint)(fingerprint.definition[:-1] + ((),))
+        other.hash = fingerprint.hash
+        self.assertNotEqual(fingerprint, other)
+
+    def test_nodes_not_kept(self):
+        p = air_cargo_p1()
+        node = Node(p.initial)
+        ref = weakref.ref(node)
+        p.h_ignore_preconditions(node)
+        del node
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_run_search_starts_cold(self):
+        for _ in range(2):
+            p = air_cargo_p1()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_search(p, astar_search, p.h_ignore_preconditions)
+            self.assertEqual(self.cache.misses, len(self.cache) + self.cache.evictions)
+            self.assertGreater(self.cache.misses, 0)
+
+    def test_configure(self):
+        cache = configure_heuristic_cache(maxsize=1, policy='arc')
+        self.assertIs(heuristic_cache.heuristic_cache, cache)
+        p = air_cargo_p1()
+        for node in Node(p.initial).expand(p):
+            p.h_ignore_preconditions(node)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
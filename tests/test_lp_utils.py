@@ -0,0 +1,150 @@
+import os
+import sys
+
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.utils import expr
+from lp_utils import (
+    FluentState, PackedState, SuccessorGenerator, GoalMask, GoalCover,
+    encode_state, encode_packed_state, decode_state, pack_state,
+)
+from aimacode.planning import Action
+from aimacode.search import Node
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+
+
+class TestPackedState(unittest.TestCase):
+    def setUp(self):
+        self.fluent_map = [expr('A'), expr('B'), expr('C'), expr('D')]
+        self.fs = FluentState([expr('B'), expr('C')], [expr('A'), expr('D')])
+
+    def test_encode(self):
+        state = encode_packed_state(self.fs, self.fluent_map)
+        self.assertEqual(len(state), 4)
+        self.assertEqual(str(state), encode_state(self.fs, self.fluent_map))
+        self.assertEqual(state.fluents, 0b0110)
+        self.assertLess(PackedState.from_string('FTTT'), PackedState.from_string('TFFF'))
+        self.assertTrue(state.holds(1))
+        self.assertFalse(state.holds(3))
+
+    def test_string_round_trip(self):
+        for s in ('FTTF', 'FFFF', 'TTTT', 'TFFFFFFFFFFT'):
+            self.assertEqual(str(PackedState.from_string(s)), s)
+        self.assertNotEqual(PackedState.from_string('F'), PackedState.from_string('FF'))
+
+    def test_decode(self):
+        state = encode_packed_state(self.fs, self.fluent_map)
+        for s in (state, str(state)):
+            fs = decode_state(s, self.fluent_map)
+            self.assertEqual(fs.pos, self.fs.pos)
+            self.assertEqual(fs.neg, self.fs.neg)
+
+    def test_pack_state(self):
+        state = PackedState.from_string('TFT')
+        self.assertIs(pack_state(state), state)
+        self.assertEqual(pack_state('TFT'), state)
+
+    def test_problem_accepts_strings(self):
+        p = air_cargo_p1()
+        self.assertIsInstance(p.initial, PackedState)
+        action = p.actions(p.initial)[0]
+        self.assertEqual(p.actions(str(p.initial)), p.actions(p.initial))
+        self.assertEqual(p.result(str(p.initial), action), p.result(p.initial, action))
+
+
+class TestSuccessorGenerator(unittest.TestCase):
+
+    def brute_force(self, p, state):
+        fs = decode_state(state, p.state_map)
+        return [a for a in p.actions_list
+                if all(f in fs.pos for f in a.precond_pos) and all(f in fs.neg for f in a.precond_neg)]
+
+    def test_same_as_brute_force(self):
+        for p in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            self.assertIsInstance(p.successors, SuccessorGenerator)
+            frontier = [Node(p.initial)]
+            seen = set()
+            while frontier and len(seen) < 200:
+                node = frontier.pop(0)
+                if node.state in seen:
+                    continue
+                seen.add(node.state)
+                self.assertEqual(p.actions(node.state), self.brute_force(p, node.state))
+                frontier.extend(node.expand(p))
+
+    def test_unindexed_actions(self):
+        p = have_cake()
+        bake = p.actions_list[1]
+        self.assertEqual(p.successors.unindexed, [1])
+        self.assertEqual(p.actions(PackedState.from_string('FT')), [bake])
+
+    def test_masks_of_equal_action(self):
+        p = have_cake()
+        bake = p.actions_list[1]
+        copy = Action(expr(bake.name)(*bake.args), [bake.precond_pos, bake.precond_neg], [bake.effect_add, bake.effect_rem])
+        self.assertIsNot(copy, bake)
+        self.assertEqual(p.successors.action_ids[copy], 1)
+        self.assertEqual(p.successors.masks(copy), p.successors.masks(bake))
+
+    def test_masks_of_unknown_action(self):
+        p = have_cake()
+        bake = p.actions_list[1]
+        # same name and arguments, but another precondition
+        other = Action(expr(bake.name)(*bake.args), [[expr('Have(Cake)')], []], [bake.effect_add, bake.effect_rem])
+        with self.assertRaisesRegex(ValueError, 'not an action of the problem'):
+            p.successors.masks(other)
+        with self.assertRaises(ValueError):
+            p.result(p.initial, other)
+
+
+class TestGoalCover(unittest.TestCase):
+
+    def setUp(self):
+        # greedy takes Big first and then needs two more actions where Left and Right cover all goals
+        goals = [expr('G{}'.format(i)) for i in range(6)]
+        self.fluent_map = goals + [expr('Other')]
+        bits = {fluent: 1 << (6 - idx) for idx, fluent in enumerate(self.fluent_map)}
+        actions = [Action(expr('Left'), [[], []], [goals[0:3], []]),
+                   Action(expr('Right'), [[], []], [goals[3:6], []]),
+                   Action(expr('Big'), [[], []], [[goals[0], goals[1], goals[3], goals[4]], []]),
+                   Action(expr('Small'), [[], []], [[goals[0], expr('Other')], []])]
+        self.cover = GoalCover(GoalMask(goals, bits), SuccessorGenerator(actions, bits))
+
+    def test_dominated_covers_dropped(self):
+        self.assertEqual(len(self.cover.covers), 3)
+
+    def test_exact_and_greedy(self):
+        state = PackedState.from_string('FFFFFFF')
+        self.assertEqual(self.cover.exact(state), 2)
+        self.assertEqual(self.cover.greedy(state), 3)
+        self.assertEqual(self.cover(state), 2)
+        state = PackedState.from_string('TTTFFFF')
+        self.assertEqual(self.cover.exact(state), 1)
+        self.assertEqual(self.cover.exact(PackedState.from_string('TTTTTTF')), 0)
+
+    def test_search_beyond_table(self):
+        # past table_goals goals the heuristic is still the exact value, not the greedy one
+        self.cover.table_goals = 2
+        state = PackedState.from_string('FFFFFFF')
+        self.assertEqual(self.cover(state), 2)
+        self.assertEqual(self.cover.exact(PackedState.from_string('TTTFFFF')), 1)
+        self.assertIsNone(self.cover._table)
+
+    def test_air_cargo(self):
+        p = air_cargo_p2()
+        self.assertEqual(p.goal_cover(p.initial), 3)
+        self.assertEqual(p.h_ignore_preconditions_greedy(Node(p.initial)), 3)
+
+    def test_uncoverable_goal(self):
+        bits = {fluent: 1 << (6 - idx) for idx, fluent in enumerate(self.fluent_map)}
+        cover = GoalCover(GoalMask(self.fluent_map[:6], bits), SuccessorGenerator([], bits))
+        state = PackedState.from_string('FFFFFFF')
+        self.assertEqual(cover(state), float('inf'))
+        self.assertEqual(cover.greedy(state), float('inf'))
+        self.assertEqual(cover(PackedState.from_string('TTTTTTF')), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
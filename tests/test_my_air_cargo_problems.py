@@ -8,7 +8,7 @@ from aimacode.search import Node
 import unittest
 from lp_utils import decode_state
 from my_air_cargo_problems import (
-    air_cargo_p1, air_cargo_p2, air_cargo_p3,
+    air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_generated,
 )
 
 class TestAirCargoProb1(unittest.TestCase):
@@ -76,9 +76,48 @@ class TestAirCargoMethods(unittest.TestCase):
         self.assertTrue(expr('In(C1, P1)') in fs.pos)
         self.assertTrue(expr('At(C1, SFO)') in fs.neg)
 
+    def test_AC_result_equal_action(self):
+        # an Action equal to one of actions_list but not the same object
+        load = next(a for a in self.p1.actions_list if str(a) == str(self.act1))
+        self.assertEqual(self.p1.result(self.p1.initial, self.act1), self.p1.result(self.p1.initial, load))
+
+    def test_AC_result_not_applicable(self):
+        state = self.p1.result(self.p1.initial, self.act1)
+        with self.assertRaisesRegex(Exception, 'not applicable'):
+            self.p1.result(state, self.act1)
+        self.p1.debug = True
+        with self.assertRaisesRegex(Exception, 'allowed_actions'):
+            self.p1.result(state, self.act1)
+
     def test_h_ignore_preconditions(self):
         n = Node(self.p1.initial)
         self.assertEqual(self.p1.h_ignore_preconditions(n), 2)
 
+class TestAirCargoGenerated(unittest.TestCase):
+
+    def test_sizes(self):
+        p = air_cargo_generated(4, 3, 5)
+        # each cargo at or in one of 5 + 3 places, each plane at one of 5 airports
+        self.assertEqual(len(p.initial), 4 * 8 + 3 * 5)
+        self.assertEqual(len(p.goal), 4)
+        self.assertEqual(len(p.actions_list), 2 * 4 * 3 * 5 + 3 * 5 * 4)
+
+    def test_seeded(self):
+        p, q = air_cargo_generated(3, 2, 3, seed=7), air_cargo_generated(3, 2, 3, seed=7)
+        self.assertEqual(p.initial, q.initial)
+        self.assertEqual(p.state_map, q.state_map)
+        self.assertEqual(p.goal, q.goal)
+        self.assertFalse(p.goal_test(p.initial))
+
+    def test_structured_like_p1(self):
+        p = air_cargo_generated(2, 2, 2)
+        self.assertEqual(len(p.initial), len(air_cargo_p1().initial))
+        self.assertEqual(p.h_ignore_preconditions(Node(p.initial)), 2)
+
+    def test_too_small(self):
+        with self.assertRaises(ValueError):
+            air_cargo_generated(2, 2, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
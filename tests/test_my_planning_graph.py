@@ -4,11 +4,13 @@ import sys
 parent = os.path.dirname(os.path.realpath(__file__))
 sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
 import unittest
-from aimacode.utils import expr
+from aimacode.utils import expr, Expr
 from aimacode.planning import Action
 from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1
+from bitset_planning_graph import compile_problem
 from my_planning_graph import (
-    PlanningGraph, PgNode_a, PgNode_s, mutexify
+    PlanningGraph, PgNode_a, PgNode_s, mutexify, planning_graph_template
 )
 
 
@@ -115,6 +117,153 @@ class TestPlanningGraphMutex(unittest.TestCase):
             "If one parent action can achieve both states, should NOT be inconsistent-support mutex, even if parent actions are themselves mutex")
 
 
+class TestPlanningGraphMutexIndex(unittest.TestCase):
+    def setUp(self):
+        self.pgs = [PlanningGraph(p, p.initial, serial_planning=serial, incremental_mutex=incremental)
+                    for p in (have_cake(), air_cargo_p1())
+                    for serial in (True, False) for incremental in (True, False)]
+
+    def test_indexed_mutex_matches_pairwise(self):
+        for pg in self.pgs:
+            for level in pg.a_levels:
+                for n1 in level:
+                    for n2 in level:
+                        expected = n1 is not n2 and (pg.serialize_actions(n1, n2) or
+                                                     pg.inconsistent_effects_mutex(n1, n2) or
+                                                     pg.interference_mutex(n1, n2) or
+                                                     pg.competing_needs_mutex(n1, n2))
+                        self.assertEqual(n1.is_mutex(n2), expected, "{} {}".format(n1, n2))
+            for level in pg.s_levels[1:]:
+                for n1 in level:
+                    for n2 in level:
+                        expected = n1 is not n2 and (pg.negation_mutex(n1, n2) or
+                                                     pg.inconsistent_support_mutex(n1, n2))
+                        self.assertEqual(n1.is_mutex(n2), expected, "{} {}".format(n1, n2))
+
+
+class TestPlanningGraphIncrementalMutex(unittest.TestCase):
+    def setUp(self):
+        self.p = air_cargo_p1()
+
+    def test_incremental_matches_full(self):
+        for serial in (True, False):
+            full = PlanningGraph(self.p, self.p.initial, serial, incremental_mutex=False)
+            incremental = PlanningGraph(self.p, self.p.initial, serial, incremental_mutex=True)
+            self.assertEqual(len(full.s_levels), len(incremental.s_levels))
+            for s_full, s_incremental in zip(full.s_levels, incremental.s_levels):
+                self.assertEqual(s_full, s_incremental)
+                self.assertEqual(PlanningGraph.mutex_pairs(s_full), PlanningGraph.mutex_pairs(s_incremental))
+
+    def test_leveled_off_on_mutexes(self):
+        pg = PlanningGraph(self.p, self.p.initial)
+        self.assertEqual(pg.s_levels[-1], pg.s_levels[-2])
+        self.assertEqual(pg.mutex_pairs(pg.s_levels[-1]), pg.mutex_pairs(pg.s_levels[-2]))
+        for level in range(1, len(pg.s_levels) - 1):
+            self.assertFalse(pg.s_levels[level] == pg.s_levels[level - 1] and
+                             pg.mutex_pairs(pg.s_levels[level]) == pg.mutex_pairs(pg.s_levels[level - 1]))
+
+
+class TestPlanningGraphTemplate(unittest.TestCase):
+    def setUp(self):
+        self.p = have_cake()
+        self.pg = PlanningGraph(self.p, self.p.initial)
+
+    def test_template_cached_on_problem(self):
+        pg = PlanningGraph(self.p, self.p.result(self.p.initial, self.p.actions_list[0]))
+        self.assertIs(pg.template, self.pg.template)
+        self.assertIs(planning_graph_template(self.p), self.pg.template)
+
+    def test_template_uses_compiled_problem(self):
+        template = self.pg.template
+        self.assertIs(template.compiled, compile_problem(self.p))
+        self.assertIs(template.pre_mask, template.compiled.pre)
+        self.assertIs(template.static_mutex, template.compiled.static_mutex)
+        for literal_id, node in enumerate(template.literals):
+            self.assertEqual((node.symbol, node.is_pos), template.compiled.literal(literal_id))
+
+    def test_noop_actions(self):
+        noops = self.pg.all_actions[len(self.p.actions_list):]
+        self.assertEqual(len(noops), 2 * len(self.p.state_map))
+        self.assertEqual(noops[0].name, 'Noop_pos')
+        self.assertEqual(Expr(noops[0].name, *noops[0].args), expr('Noop_pos(Have(Cake))'))
+
+    def test_nodes_not_shared_with_template(self):
+        prototypes = {id(node) for nodes in self.pg.template.effnodes for node in nodes}
+        for level in self.pg.s_levels:
+            for node in level:
+                self.assertNotIn(id(node), prototypes)
+
+    def test_literals_interned(self):
+        template = self.pg.template
+        self.assertEqual(len(template.literals), 2 * len(self.p.state_map))
+        for nodes in template.prenodes + template.effnodes:
+            for node in nodes:
+                self.assertIs(template.literal(node.symbol, node.is_pos), node)
+
+    def test_nodes_indexed_by_id(self):
+        for level, nodes in enumerate(self.pg.s_nodes):
+            self.assertEqual({node for node in nodes if node is not None}, self.pg.s_levels[level])
+            for node in self.pg.s_levels[level]:
+                self.assertIs(self.pg.literal_node(level, (node.symbol, node.is_pos)), node)
+        for level, nodes in enumerate(self.pg.a_nodes):
+            self.assertEqual({node for node in nodes if node is not None}, self.pg.a_levels[level])
+
+    def test_slotted_nodes(self):
+        for level in self.pg.s_levels + self.pg.a_levels:
+            for node in level:
+                self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_levels_stored_as_bitsets(self):
+        for level, s_level in enumerate(self.pg.s_levels):
+            self.assertEqual(bin(self.pg.s_masks[level]).count('1'), len(s_level))
+            for node in s_level:
+                mutex = {other.literal_id for other in node.mutex}
+                self.assertEqual(self.pg.s_mutex[level][node.literal_id], sum(1 << i for i in mutex))
+        for level, a_level in enumerate(self.pg.a_levels):
+            self.assertEqual(sorted(node.action_id for node in a_level), self.pg.action_ids[level])
+
+    def test_heuristics_create_no_nodes(self):
+        p = air_cargo_p1()
+        pg = PlanningGraph(p, p.initial, lazy=True)
+        pg.h_levelsum()
+        pg.h_setlevel()
+        pg.h_ff()
+        pg.h_add()
+        self.assertEqual(pg._s_views, {})
+        self.assertEqual(pg._a_views, {})
+
+
+class TestPlanningGraphLazy(unittest.TestCase):
+    def setUp(self):
+        self.p = air_cargo_p1()
+        self.pg = PlanningGraph(self.p, self.p.initial)
+        self.lazy = PlanningGraph(self.p, self.p.initial, lazy=True)
+
+    def test_lazy_levelsum(self):
+        self.assertEqual(len(self.lazy.s_levels), 1)
+        self.assertEqual(self.lazy.h_levelsum(), self.pg.h_levelsum())
+        self.assertLess(len(self.lazy.s_levels), len(self.pg.s_levels))
+        self.assertEqual(self.lazy.mutex_levels, 1)
+
+    def test_literal_level(self):
+        for level, s_level in enumerate(self.pg.s_levels):
+            for node in s_level:
+                self.assertLessEqual(self.pg.literal_level[(node.symbol, node.is_pos)], level)
+        self.assertEqual(self.pg.literal_level[(expr('At(C1, JFK)'), True)], 2)
+
+    def test_mutexes_computed_on_demand(self):
+        self.lazy.h_levelsum()
+        self.lazy.expand(mutex=True)
+        self.assertEqual(len(self.lazy.s_levels), len(self.pg.s_levels))
+        for s_lazy, s_eager in zip(self.lazy.s_levels, self.pg.s_levels):
+            self.assertEqual(s_lazy, s_eager)
+            self.assertEqual(PlanningGraph.mutex_pairs(s_lazy), PlanningGraph.mutex_pairs(s_eager))
+
+    def test_unreachable_goal(self):
+        self.assertFalse(self.lazy.expand([(expr('At(C1, Nowhere)'), True)]))
+        self.assertTrue(self.lazy.leveled)
+
+
 class TestPlanningGraphHeuristics(unittest.TestCase):
     def setUp(self):
         self.p = have_cake()
@@ -123,6 +272,36 @@ class TestPlanningGraphHeuristics(unittest.TestCase):
     def test_levelsum(self):
         self.assertEqual(self.pg.h_levelsum(), 1)
 
+    def test_maxlevel(self):
+        self.assertEqual(self.pg.h_maxlevel(), 1)
+
+    def test_setlevel(self):
+        # Have(Cake) and Eaten(Cake) are mutex at S1 (only Eat produces Eaten(Cake))
+        self.assertEqual(self.pg.h_setlevel(), 2)
+
+    def test_relaxed_costs(self):
+        self.assertEqual(self.pg.h_add(), 1)
+        self.assertEqual(self.pg.h_max(), 1)
+
+    def test_ff(self):
+        self.assertEqual(self.pg.h_ff(), 1)
+
+    def test_heuristics_air_cargo(self):
+        p = air_cargo_p1()
+        # the optimal plan has 6 actions
+        heuristics = {h: getattr(PlanningGraph(p, p.initial, lazy=True), h)()
+                      for h in ('h_levelsum', 'h_maxlevel', 'h_setlevel', 'h_add', 'h_max', 'h_ff')}
+        self.assertEqual(heuristics, {'h_levelsum': 4, 'h_maxlevel': 2, 'h_setlevel': 4,
+                                      'h_add': 6, 'h_max': 2, 'h_ff': 6})
+
+    def test_unreachable_goal(self):
+        p = have_cake()
+        p.goal = p.goal + [expr('Eaten(Pie)')]
+        p.state_map = p.state_map + [expr('Eaten(Pie)')]
+        state = str(p.initial) + 'F'
+        for h in ('h_maxlevel', 'h_setlevel', 'h_add', 'h_max', 'h_ff'):
+            self.assertEqual(getattr(PlanningGraph(p, state, lazy=True), h)(), float('inf'), h)
+
 
 if __name__ == '__main__':
     unittest.main()
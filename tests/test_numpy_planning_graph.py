@@ -0,0 +1,53 @@
+import os
+import sys
+
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+from my_planning_graph import PlanningGraph
+from numpy_planning_graph import MatrixPlanningGraph, matrix_problem, np
+from tests.test_bitset_planning_graph import node_levels
+
+
+def matrix_levels(pg):
+    """levels and mutex pairs of a MatrixPlanningGraph as comparable python values"""
+    cp = pg.matrices.compiled
+    s_levels = [{cp.literal(l) for l in np.flatnonzero(level)} for level in pg.s_levels]
+    a_levels = [{str(cp.action(a)) for a in np.flatnonzero(level)} for level in pg.a_levels]
+    s_mutex = [{frozenset([cp.literal(l), cp.literal(m)]) for l, m in zip(*np.nonzero(mutex))}
+               for mutex in pg.s_mutex]
+    a_mutex = [{frozenset([str(cp.action(a)), str(cp.action(b))]) for a, b in zip(*np.nonzero(mutex))}
+               for mutex in pg.a_mutex]
+    return s_levels, a_levels, s_mutex, a_mutex
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestMatrixPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.p = have_cake()
+        self.pg = MatrixPlanningGraph(self.p, self.p.initial)
+
+    def test_level_sizes(self):
+        self.assertEqual(self.pg.a_levels[0].sum(), 3)
+        self.assertEqual(self.pg.a_levels[1].sum(), 6)
+        self.assertEqual([s.sum() for s in self.pg.s_levels[:3]], [2, 4, 4])
+
+    def test_levelsum(self):
+        self.assertEqual(self.pg.h_levelsum(), 1)
+
+    def test_matrices_built_once(self):
+        self.assertIs(matrix_problem(self.p), self.pg.matrices)
+
+    def test_same_as_planning_graph(self):
+        for problem in (self.p, air_cargo_p1(), air_cargo_p2()):
+            for serial in (True, False):
+                pg = PlanningGraph(problem, problem.initial, serial_planning=serial)
+                mpg = MatrixPlanningGraph(problem, problem.initial, serial_planning=serial)
+                self.assertEqual(node_levels(pg), matrix_levels(mpg))
+                self.assertEqual(pg.h_levelsum(), mpg.h_levelsum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.planning import Action
+from aimacode.search import astar_search, breadth_first_search
+from aimacode.utils import expr
+from lp_utils import FluentState, decode_state
+from my_air_cargo_problems import AirCargoProblem, air_cargo_p1
+from pruning import prune_problem, reachable_actions
+
+
+class TestPruning(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = air_cargo_p1()
+        self.initial = decode_state(self.p1.initial, self.p1.state_map)
+
+    def test_nothing_pruned_in_p1(self):
+        self.assertEqual(self.p1.pruning_stats['unreachable_actions'], 0)
+        self.assertEqual(self.p1.pruning_stats['irrelevant_actions'], 0)
+        self.assertEqual(self.p1.pruning_stats['pruned_fluents'], 0)
+
+    def test_irrelevant_cargo(self):
+        # with no goal on C2 its Load and Unload actions and At/In fluents are dropped
+        p = AirCargoProblem(self.p1.cargos, self.p1.planes, self.p1.airports, self.initial, [expr('At(C1, JFK)')])
+        self.assertEqual(len(p.actions_list), 12)
+        self.assertEqual(len(p.state_map), 8)
+        self.assertFalse(any('C2' in str(f) for f in p.state_map))
+        self.assertEqual(p.pruning_stats['irrelevant_actions'], 8)
+        self.assertEqual(p.pruning_stats['pruned_fluents'], 4)
+        plan = astar_search(p, p.h_ignore_preconditions).solution()
+        self.assertEqual(len(plan), 3)
+
+    def test_prune_disabled(self):
+        p = AirCargoProblem(self.p1.cargos, self.p1.planes, self.p1.airports, self.initial, [expr('At(C1, JFK)')],
+                            prune=False)
+        self.assertEqual(len(p.actions_list), 20)
+        self.assertIsNone(p.pruning_stats)
+        self.assertEqual(len(breadth_first_search(p).solution()), 3)
+
+    def test_unreachable(self):
+        initial = FluentState([expr('A')], [expr('B'), expr('C'), expr('D')])
+        to_b = Action(expr('ToB'), [[expr('A')], []], [[expr('B'), expr('D')], [expr('A')]])
+        to_c = Action(expr('ToC'), [[expr('C')], []], [[expr('B')], []])
+        back = Action(expr('Back'), [[], [expr('A')]], [[expr('C')], []])
+        self.assertEqual(reachable_actions(initial, [to_c, to_b]), [to_b])
+        self.assertEqual(reachable_actions(initial, [to_c, back, to_b]), [to_c, back, to_b])
+        kept_initial, actions, stats = prune_problem(initial, [expr('B')], [to_c, to_b])
+        self.assertEqual([str(a) for a in actions], [str(to_b)])
+        self.assertEqual(stats['unreachable_actions'], 1)
+        # C and D are read by no kept action, the effect of ToB on D is dropped along with D
+        self.assertEqual(kept_initial.pos + kept_initial.neg, [expr('A'), expr('B')])
+        self.assertEqual(actions[0].effect_add, [expr('B')])
+        self.assertEqual(to_b.effect_add, [expr('B'), expr('D')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.planning import Action
+from aimacode.utils import expr
+from example_have_cake import have_cake
+from lp_utils import FluentState, decode_state
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p3
+from sas import is_invariant, mutex_groups, sas_task
+
+
+class TestMutexGroups(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = air_cargo_p1()
+        self.initial = decode_state(self.p1.initial, self.p1.state_map)
+
+    def test_air_cargo_groups(self):
+        groups = sorted(sorted(str(f) for f in group) for group in mutex_groups(self.initial, self.p1.actions_list))
+        self.assertEqual(groups, [['At(C1, JFK)', 'At(C1, SFO)', 'In(C1, P1)', 'In(C1, P2)'],
+                                  ['At(C2, JFK)', 'At(C2, SFO)', 'In(C2, P1)', 'In(C2, P2)'],
+                                  ['At(P1, JFK)', 'At(P1, SFO)'],
+                                  ['At(P2, JFK)', 'At(P2, SFO)']])
+
+    def test_not_invariant(self):
+        # two fluents of the group true initially, or an action adding one without removing the other
+        group = [expr('At(P1, JFK)'), expr('At(P1, SFO)')]
+        self.assertFalse(is_invariant(group, FluentState(group, []), []))
+        teleport = Action(expr('Teleport(P1)'), [[], []], [[expr('At(P1, JFK)')], []])
+        self.assertFalse(is_invariant(group, self.initial, self.p1.actions_list + [teleport]))
+        self.assertTrue(is_invariant(group, self.initial, self.p1.actions_list))
+
+    def test_have_cake(self):
+        # Have(Cake) is a negative precondition of Bake, so both fluents stay binary
+        p = have_cake()
+        self.assertEqual(mutex_groups(decode_state(p.initial, p.state_map), p.actions_list), [])
+        self.assertEqual(sas_task(p).num_bits, 2)
+
+
+class TestSASTask(unittest.TestCase):
+
+    def setUp(self):
+        self.p3 = air_cargo_p3()
+        self.task = sas_task(self.p3)
+
+    def test_bits(self):
+        # four cargos at 4 airports or in 2 planes, two planes at 4 airports
+        self.assertEqual([len(domain) for domain in self.task.domains], [6, 6, 6, 6, 4, 4])
+        self.assertEqual(self.task.num_bits, 16)
+        self.assertIs(sas_task(self.p3), self.task)
+
+    def test_encode_decode(self):
+        self.assertEqual(self.task.decode(self.task.initial), self.p3.initial)
+        self.assertEqual(self.task.encode(self.p3.initial), self.task.initial)
+
+    def test_successors(self):
+        state, packed = self.p3.initial, self.task.initial
+        for _ in range(12):
+            actions = self.p3.actions(state)
+            operators = self.task.applicable(packed)
+            self.assertEqual(sorted(str(a) for a in actions), sorted(str(op.action) for op in operators))
+            op = operators[-1]
+            state, packed = self.p3.result(state, op.action), op.apply(packed)
+            self.assertEqual(self.task.decode(packed), state)
+
+
+if __name__ == '__main__':
+    unittest.main()
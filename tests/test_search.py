@@ -0,0 +1,255 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+import tracemalloc
+from aimacode.search import (
+    TIE_BREAKING, InstrumentedProblem, Node, Problem, astar_search, depth_limited_search,
+    iterative_deepening_astar_search, breadth_first_search, depth_first_graph_search,
+    greedy_best_first_graph_search, state_key, uniform_cost_search,
+)
+from aimacode.utils import IndexedStack, IndexedFIFOQueue, IndexedPriorityQueue
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+
+
+class TestIndexedQueues(unittest.TestCase):
+
+    def test_fifo_order(self):
+        q = IndexedFIFOQueue()
+        q.extend([3, 1, 2])
+        self.assertEqual(len(q), 3)
+        self.assertIn(1, q)
+        self.assertEqual([q.pop() for _ in range(3)], [3, 1, 2])
+        self.assertNotIn(1, q)
+
+    def test_stack_order(self):
+        q = IndexedStack()
+        q.extend([3, 1, 2])
+        self.assertEqual([q.pop() for _ in range(3)], [2, 1, 3])
+        with self.assertRaises(IndexError):
+            q.pop()
+
+    def test_remove_and_replace(self):
+        q = IndexedFIFOQueue(key=lambda item: item[0])
+        q.extend([('a', 1), ('b', 1), ('c', 1)])
+        q.remove(('b', None))
+        self.assertEqual(len(q), 2)
+        self.assertFalse(q.has_key('b'))
+        # a replaced item keeps its place, a removed and appended again one goes to the back
+        q.append(('a', 2))
+        q.append(('b', 2))
+        self.assertEqual(q[('a', None)], ('a', 2))
+        self.assertEqual([q.pop() for _ in range(3)], [('a', 2), ('c', 1), ('b', 2)])
+        self.assertEqual(len(q), 0)
+
+    def test_node_keys(self):
+        p = air_cargo_p1()
+        q = IndexedStack(state_key(p))
+        q.append(Node(p.initial))
+        self.assertIn(Node(p.initial, path_cost=3), q)
+        self.assertTrue(q.has_key(p.initial))
+
+
+class TestIndexedPriorityQueue(unittest.TestCase):
+
+    def setUp(self):
+        # items are (name, cost) keyed by name
+        self.q = IndexedPriorityQueue(min, f=lambda item: item[1], key=lambda item: item[0])
+        self.q.extend([('a', 5), ('b', 3), ('c', 4), ('d', 1)])
+
+    def test_order(self):
+        self.assertEqual([self.q.pop() for _ in range(4)], [('d', 1), ('b', 3), ('c', 4), ('a', 5)])
+        self.assertEqual(len(self.q), 0)
+
+    def test_min_order_only(self):
+        with self.assertRaises(ValueError):
+            IndexedPriorityQueue(max, f=lambda item: item[1])
+
+    def test_decrease_key(self):
+        self.q.append(('a', 2))
+        self.q.append(('b', 9))
+        self.assertEqual(len(self.q), 4)
+        self.assertEqual(self.q[('b', None)], ('b', 3))
+        self.assertEqual([self.q.pop() for _ in range(4)], [('d', 1), ('a', 2), ('b', 3), ('c', 4)])
+
+    def test_delete(self):
+        del self.q[('d', None)]
+        self.assertNotIn(('d', 0), self.q)
+        self.assertTrue(self.q.has_key('c'))
+        self.assertEqual([self.q.pop() for _ in range(3)], [('b', 3), ('c', 4), ('a', 5)])
+
+
+class TestNodeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = air_cargo_p1()
+        self.root = Node(self.p1.initial)
+
+    def test_view(self):
+        action = self.p1.actions(self.p1.initial)[0]
+        child = self.root.child_node(self.p1, action)
+        self.assertIs(child.store, self.root.store)
+        self.assertEqual(child.parent, self.root)
+        self.assertIs(child.action, action)
+        self.assertEqual((child.path_cost, child.depth), (1, 1))
+        self.assertEqual(child.solution(), [action])
+        self.assertEqual(child.path(), [self.root, child])
+        self.assertIsNone(self.root.parent)
+
+    def test_f_h_slots(self):
+        self.assertFalse(hasattr(self.root, 'f'))
+        self.root.f = 3
+        self.root.h = 2
+        self.assertEqual((self.root.f, self.root.h), (3, 2))
+        with self.assertRaises(AttributeError):
+            self.root.g = 1
+
+    def test_values_keep_their_type(self):
+        self.root.h = 2
+        self.root.f = 2.5
+        self.assertIs(type(self.root.h), int)
+        self.assertIs(type(self.root.path_cost), int)
+        self.assertEqual(self.root.f, 2.5)
+        p = air_cargo_p1()
+        node = astar_search(p, p.h_ignore_preconditions)
+        self.assertEqual([type(n.h) for n in node.path()], [int] * len(node.path()))
+
+    def test_actions_keyed_by_value(self):
+        # equal actions share an id, whatever their lifetime
+        problem = air_cargo_p1()
+        store = self.root.store
+        for problem_actions in (self.p1.actions_list, problem.actions_list):
+            for action in problem_actions:
+                store.add(self.root.state, self.root.id, action, 1)
+        self.assertEqual(len(store.actions), len(self.p1.actions_list))
+        self.assertEqual(store.action_ids[problem.actions_list[3]], 3)
+
+    def test_release(self):
+        store = self.root.store
+        mark = store.mark()
+        for child in self.root.expand(self.p1):
+            child.expand(self.p1)
+        self.assertGreater(len(store), 1)
+        store.release(mark)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(len(store.g), 1)
+        # a depth limited search keeps only the root and the children of the nodes of the path it returns
+        node = depth_limited_search(self.p1)
+        self.assertEqual(len(node.store), 1 + sum(len(self.p1.actions(n.state)) for n in node.path()[:-1]))
+
+    def test_node_size(self):
+        state = self.p1.initial
+        tracemalloc.start()
+        node = Node(state)
+        for i in range(10000):
+            node = Node(state, node, None, i)
+            node.f = node.h = 1
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertLess(size / 10000, 80)
+        self.assertEqual(len(node.path()), 10001)
+
+
+class TestGraphSearches(unittest.TestCase):
+
+    def test_expansions(self):
+        # the indexed frontiers detect the same duplicates as the scans they replace
+        p = InstrumentedProblem(air_cargo_p2())
+        self.assertEqual(len(breadth_first_search(p).solution()), 9)
+        self.assertEqual((p.succs, p.goal_tests, p.states), (3343, 4609, 30509))
+        p = InstrumentedProblem(air_cargo_p2())
+        self.assertEqual(len(depth_first_graph_search(p).solution()), 575)
+        self.assertEqual(p.succs, 582)
+
+    def test_best_first(self):
+        p = InstrumentedProblem(air_cargo_p2())
+        self.assertEqual(len(uniform_cost_search(p).solution()), 9)
+        self.assertEqual(p.succs, 4761)
+        p = air_cargo_p1()
+        self.assertEqual(len(astar_search(p, p.h_ignore_preconditions).solution()), 6)
+
+    def test_tie_breaking(self):
+        expansions = {}
+        for policy in TIE_BREAKING:
+            p = air_cargo_p2()
+            ip = InstrumentedProblem(p)
+            self.assertEqual(len(astar_search(ip, p.h_ignore_preconditions, policy).solution()), 9)
+            expansions[policy] = ip.succs
+        # preferring lower h on the f plateaus expands fewer nodes than first-in-first-out
+        self.assertLess(expansions['low_h'], expansions['fifo'])
+
+    def test_astar_default_tie_breaking(self):
+        # low_h is opt-in: by default astar_search orders ties as best_first_graph_search does
+        succs = []
+        for args in ((), ('state',)):
+            p = air_cargo_p2()
+            ip = InstrumentedProblem(p)
+            astar_search(ip, p.h_ignore_preconditions, *args)
+            succs.append(ip.succs)
+        self.assertEqual(succs[0], succs[1])
+
+    def test_greedy_plan_length(self):
+        # the policies on h use h itself, which is f in greedy search, not f - path_cost
+        for problem, length in ((air_cargo_p1, 6), (air_cargo_p2, 9)):
+            for policy in ('state', 'low_h'):
+                p = problem()
+                self.assertEqual(len(greedy_best_first_graph_search(p, p.h_1, policy).solution()), length)
+
+    def test_tie_queue(self):
+        q = IndexedPriorityQueue(min, f=lambda item: item[1], key=lambda item: item[0],
+                                 tie=lambda item, count: -count)
+        q.extend([('a', 1), ('b', 0), ('c', 1)])
+        self.assertEqual([q.pop() for _ in range(3)], [('b', 0), ('c', 1), ('a', 1)])
+
+
+class Ring(Problem):
+    """states 0..n-1 on a ring, each state leading to the next one"""
+
+    def __init__(self, n, goal):
+        Problem.__init__(self, 0, goal)
+        self.n = n
+
+    def actions(self, state):
+        return ['next']
+
+    def result(self, state, action):
+        return (state + 1) % self.n
+
+
+class TestIterativeDeepeningAstar(unittest.TestCase):
+
+    def test_optimal(self):
+        for problem, length in ((air_cargo_p1(), 6), (air_cargo_p2(), 9)):
+            node = iterative_deepening_astar_search(problem, problem.h_ignore_preconditions)
+            self.assertEqual(len(node.solution()), length)
+            state = problem.initial
+            for action in node.solution():
+                state = problem.result(state, action)
+            self.assertTrue(problem.goal_test(state))
+
+    def test_transposition_table(self):
+        expansions = []
+        for table_size in (2 ** 16, 0):
+            p = InstrumentedProblem(air_cargo_p1())
+            node = iterative_deepening_astar_search(p, p.h_ignore_preconditions, table_size)
+            self.assertEqual(len(node.solution()), 6)
+            expansions.append(p.succs)
+        self.assertLess(expansions[0], expansions[1])
+
+    def test_memory_bounded(self):
+        # only the root and the children of the nodes on the returned path are kept in the store
+        p = air_cargo_p2()
+        node = iterative_deepening_astar_search(p, p.h_ignore_preconditions, order_successors=False)
+        self.assertEqual(len(node.store), 1 + sum(len(p.actions(n.state)) for n in node.path()[:-1]))
+
+    def test_deep_and_unsolvable(self):
+        # a plan deeper than the recursion limit, and a goal off the ring
+        n = sys.getrecursionlimit() + 100
+        node = iterative_deepening_astar_search(Ring(n, n - 1), lambda node: n - 1 - node.state)
+        self.assertEqual(node.depth, n - 1)
+        self.assertIsNone(iterative_deepening_astar_search(Ring(5, 7), lambda node: 0, table_size=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.search import InstrumentedProblem, breadth_first_search, astar_search
+from aimacode.utils import expr
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_generated
+from symmetry import rename
+
+
+class TestSymmetry(unittest.TestCase):
+
+    def setUp(self):
+        # structured 4 cargos, 4 planes, 2 airports: C1/C3, C2/C4, P1/P3 and P2/P4 start and end alike
+        self.p = air_cargo_generated(4, 4, 2)
+
+    def test_rename(self):
+        self.assertEqual(rename(expr('In(C1, P1)'), {'C1': 'C3', 'C3': 'C1'}), expr('In(C3, P1)'))
+
+    def test_classes(self):
+        self.assertEqual(self.p.symmetry.classes, [['C1', 'C3'], ['C2', 'C4'], ['P1', 'P3'], ['P2', 'P4']])
+        for p in (air_cargo_p1(), air_cargo_p2(), air_cargo_p3()):
+            self.assertIsNone(p.symmetry)
+            self.assertEqual(p.canonical(p.initial), p.initial)
+
+    def test_canonical(self):
+        p = self.p
+        load = {str(a): a for a in p.actions_list}
+        c1 = p.result(p.initial, load['Load(C1, P1, A1)'])
+        c3 = p.result(p.initial, load['Load(C3, P3, A1)'])
+        self.assertNotEqual(c1, c3)
+        self.assertEqual(p.canonical(c1), p.canonical(c3))
+        self.assertEqual(p.canonical(p.canonical(c1)), p.canonical(c1))
+        self.assertNotEqual(p.canonical(c1), p.canonical(p.result(p.initial, load['Load(C2, P2, A2)'])))
+
+    def test_search(self):
+        reduced = InstrumentedProblem(self.p)
+        full = InstrumentedProblem(air_cargo_generated(4, 4, 2))
+        full.problem.symmetry = None
+        plan = breadth_first_search(reduced).solution()
+        self.assertEqual(len(plan), len(breadth_first_search(full).solution()))
+        self.assertLess(reduced.succs, full.succs / 2)
+        state = self.p.initial
+        for action in plan:
+            self.assertIn(action, self.p.actions(state))
+            state = self.p.result(state, action)
+        self.assertTrue(self.p.goal_test(state))
+        self.assertEqual(len(astar_search(self.p, self.p.h_ignore_preconditions).solution()), len(plan))
+
+
+if __name__ == '__main__':
+    unittest.main()